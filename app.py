@@ -3,30 +3,48 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-from typing import Optional
+import queue
+import gc
+import sys
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import importlib
+import importlib.util
+from typing import Optional, TYPE_CHECKING
 import cv2
+# A small fixed OpenCV pool (and no OpenCL) keeps resize/convert calls from
+# competing with the detector backend and the pipeline threads for cores
+cv2.setNumThreads(2)
+cv2.ocl.setUseOpenCL(False)
 from PIL import Image, ImageTk, ImageDraw, ImageFilter, ImageFont
-try:
-    import face_recognition
-    FACE_RECOGNITION_AVAILABLE = True
-except ImportError:
-    FACE_RECOGNITION_AVAILABLE = False
+# face_recognition (dlib), the detector backends and the Gemini client are heavy,
+# so they are imported lazily by the code paths that need them.
+FACE_RECOGNITION_AVAILABLE = importlib.util.find_spec("face_recognition") is not None
+# Optional detector backends pull in TensorFlow, so only check they are installed
+RETINAFACE_AVAILABLE = importlib.util.find_spec("retinaface") is not None
+DEEPFACE_AVAILABLE = importlib.util.find_spec("deepface") is not None
+if not FACE_RECOGNITION_AVAILABLE:
     print("WARNING: face_recognition not available. Install dlib to enable face recognition.")
     print("See INSTALL_DLIB_WINDOWS.md for installation instructions.")
 import pickle
+import json
+import sqlite3
+from contextlib import closing
 from pathlib import Path
-from collections import Counter
 import shutil
 import os
+import time
 import numpy as np
 from datetime import date, datetime
-from yolo_face_detector import YOLOFaceDetector
-from yolov8_detector import YOLOv8FaceDetector
-from retinaface_detector import RetinaFaceDetector
-from deepface_detector import DeepFaceDetector
 from deepface_calibration import DeepFaceCalibrator
-from video_utils import extract_frames_from_video, process_video_for_training, get_video_frames
-from gemini_live_api import GeminiLiveAPI
+from video_utils import (
+    extract_frames_from_video, process_video_for_training, get_video_frames, sample_video_frames
+)
+from face_gallery import FaceGallery, load_encodings, save_encodings
+from face_encoding import ENCODING_BATCH_SIZE, batch_face_encodings
+if TYPE_CHECKING:
+    from gemini_live_api import GeminiLiveAPI
 try:
     from attendance_sheet import mark_present, get_present_students
     ATTENDANCE_AVAILABLE = True
@@ -34,24 +52,327 @@ except ImportError as e:
     ATTENDANCE_AVAILABLE = False
     print(f"Warning: attendance_sheet not available. Smart Attendance will not work.\nError: {e}")
 
+# Cache for lazily imported heavy modules
+_lazy_modules = {}
+
+
+def _lazy_import(module_name):
+    """Import a module on first use and cache it."""
+    module = _lazy_modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+        _lazy_modules[module_name] = module
+    return module
+
+
+def _put_drop_oldest(frame_queue, item):
+    """Put an item on a bounded queue, discarding the oldest entry when it is full.
+
+    Returns the discarded item (or None) so callers can recycle its buffer.
+    """
+    dropped = None
+    while True:
+        try:
+            frame_queue.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                dropped = frame_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def _ewma(average, sample):
+    """Fold a new latency sample into an exponentially weighted moving average."""
+    if average is None:
+        return sample
+    return average + LATENCY_EWMA_ALPHA * (sample - average)
+
+
+def _frame_step(latency_ms):
+    """Process every Nth frame so that inference keeps up with FRAME_BUDGET_MS."""
+    return max(1, int(latency_ms / FRAME_BUDGET_MS) + 1)
+
+
+def _motion_thumbnail(frame):
+    """Tiny grayscale copy of a BGR frame for cheap scene-change checks."""
+    thumbnail = cv2.resize(frame, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+
+
+def _motion_score(thumbnail, reference):
+    """Largest per-block mean absolute difference between two motion thumbnails."""
+    # INTER_AREA averages each block, so the max picks out local motion
+    # that a whole-frame mean would dilute
+    block_means = cv2.resize(
+        cv2.absdiff(thumbnail, reference), MOTION_GRID_SIZE, interpolation=cv2.INTER_AREA
+    )
+    return float(block_means.max())
+
+
+def _downscale_for_detection(frame, max_side=None):
+    """Shrink a frame so its longest side is at most max_side. Returns (frame, scale)."""
+    max_side = max_side or DETECTION_MAX_SIDE
+    scale = min(1.0, max_side / max(frame.shape[:2]))
+    if scale < 1.0:
+        frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return frame, scale
+
+
+def _scale_face_locations(face_locations, scale):
+    """Map (top, right, bottom, left) boxes from a downscaled frame back to full size."""
+    if scale == 1.0 or len(face_locations) == 0:
+        return list(face_locations)
+    # One multiply and truncating cast over the whole (K, 4) box array
+    boxes = np.asarray(face_locations, dtype=np.float64).reshape(-1, 4) * (1.0 / scale)
+    return [tuple(box) for box in boxes.astype(np.int64).tolist()]
+
+
+def _text_stamp(size, texts):
+    """
+    Pre-render text once so it can be pasted onto frames instead of redrawn.
+    
+    Args:
+        size: (width, height) of the stamp
+        texts: List of (text, origin, font, font_scale, color, thickness),
+            drawn in order with cv2.putText
+        
+    Returns:
+        Tuple of (BGR image, boolean mask of drawn pixels with shape (h, w, 1))
+    """
+    width, height = size
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    for text, origin, font, font_scale, color, thickness in texts:
+        # LINE_8 (no anti-aliasing) keeps the mask exact
+        cv2.putText(image, text, origin, font, font_scale, color, thickness, cv2.LINE_8)
+    return image, image.any(axis=2, keepdims=True)
+
+
+def _paste_stamp(frame, stamp, x, y):
+    """Copy a stamp's drawn pixels onto a frame at (x, y). Returns False if it does not fit."""
+    image, mask = stamp
+    region = frame[y:y + image.shape[0], x:x + image.shape[1]]
+    if region.shape != image.shape:
+        return False
+    np.copyto(region, image, where=mask)
+    return True
+
+
+def _fast_copy(src, dst):
+    """
+    Copy file contents without metadata, in the kernel where possible.
+    
+    Uses os.copy_file_range (Linux) so the data never passes through user
+    space, falling back to shutil.copyfile elsewhere.
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+        except OSError:
+            # e.g. unsupported across these filesystems
+            pass
+    shutil.copyfile(src, dst)
+
+
+def _copy_files(pairs, max_workers=8):
+    """
+    Copy (src, dst) pairs concurrently with _fast_copy.
+    
+    Returns:
+        List with None for each successful copy or the raised exception
+    """
+    def copy_one(pair):
+        try:
+            _fast_copy(*pair)
+            return None
+        except Exception as e:
+            return e
+    
+    if len(pairs) <= 1:
+        return [copy_one(pair) for pair in pairs]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(copy_one, pairs))
+
+
+def _box_iou(box_a, box_b):
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+    area_a = (box_a[1] - box_a[3]) * (box_a[2] - box_a[0])
+    area_b = (box_b[1] - box_b[3]) * (box_b[2] - box_b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class FaceTrackCache:
+    """
+    Remembers who was recognized where, so faces that barely moved can reuse
+    their identity instead of being re-encoded on every detection.
+    
+    A face reuses a track's name when its box overlaps the track's last box
+    by more than TRACK_IOU_THRESHOLD and the track was encoded fewer than
+    TRACK_REENCODE_FRAMES frames ago; older tracks are re-verified.
+    """
+    
+    def __init__(self):
+        # Each track: [box, name, frame last encoded, frame last seen]
+        self.tracks = []
+    
+    def clear(self):
+        self.tracks = []
+    
+    def lookup(self, box, frame_number):
+        """Return the cached name for a box, or None if it needs encoding."""
+        best_track = None
+        best_iou = TRACK_IOU_THRESHOLD
+        for track in self.tracks:
+            iou = _box_iou(box, track[0])
+            if iou > best_iou:
+                best_track, best_iou = track, iou
+        if best_track is None or frame_number - best_track[2] >= TRACK_REENCODE_FRAMES:
+            return None
+        # Follow the face as it moves
+        best_track[0] = box
+        best_track[3] = frame_number
+        return best_track[1]
+    
+    def update(self, box, name, frame_number):
+        """Record a freshly recognized face, replacing the track it overlaps."""
+        self.tracks = [
+            track for track in self.tracks
+            if _box_iou(box, track[0]) <= TRACK_IOU_THRESHOLD
+            and frame_number - track[3] < TRACK_EVICT_FRAMES
+        ]
+        self.tracks.append([box, name, frame_number, frame_number])
+
+
+# Every flip/rotate combination from the camera settings, collapsed into at
+# most one transpose followed by one flip:
+# (flip_horizontal, flip_vertical, rotation) -> (transpose, cv2.flip code or None)
+_ORIENTATIONS = {
+    (False, False, 0): (False, None),
+    (False, False, 90): (True, 1),
+    (False, False, 180): (False, -1),
+    (False, False, 270): (True, 0),
+    (False, True, 0): (False, 0),
+    (False, True, 90): (True, None),
+    (False, True, 180): (False, 1),
+    (False, True, 270): (True, -1),
+    (True, False, 0): (False, 1),
+    (True, False, 90): (True, -1),
+    (True, False, 180): (False, 0),
+    (True, False, 270): (True, None),
+    (True, True, 0): (False, -1),
+    (True, True, 90): (True, 0),
+    (True, True, 180): (False, None),
+    (True, True, 270): (True, 1),
+}
+
+
+def _orientation_function(flip_horizontal, flip_vertical, rotation):
+    """
+    Build a function that applies the camera flip and rotation settings.
+
+    Equivalent to flipping horizontally, then vertically, then rotating
+    clockwise by ``rotation`` degrees, in at most two OpenCV passes and
+    without materialising every step. The choice of OpenCV calls is made
+    here, once per settings change, instead of on every frame.
+
+    Args:
+        flip_horizontal: Mirror left/right
+        flip_vertical: Mirror top/bottom
+        rotation: Clockwise rotation in degrees (0, 90, 180 or 270)
+
+    Returns:
+        Function mapping a BGR frame to the transformed frame (the identity
+        when nothing changes)
+    """
+    key = (bool(flip_horizontal), bool(flip_vertical), rotation)
+    transpose, flip_code = _ORIENTATIONS.get(key, _ORIENTATIONS[key[:2] + (0,)])
+    if transpose and flip_code == 1:
+        return lambda frame: cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    if transpose and flip_code == 0:
+        return lambda frame: cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    if transpose and flip_code is not None:
+        return lambda frame: cv2.flip(cv2.transpose(frame), flip_code)
+    if transpose:
+        return cv2.transpose
+    if flip_code is not None:
+        return lambda frame: cv2.flip(frame, flip_code)
+    return lambda frame: frame
+
+
 # Model-specific encoding paths
 ENCODINGS_PATHS = {
-    "yolov8": Path("output/encodings_yolov8.pkl"),
-    "yolov11": Path("output/encodings_yolov11.pkl"),
-    "retinaface": Path("output/encodings_retinaface.pkl"),
-    "deepface": Path("output/encodings_deepface.pkl"),
+    "yolov8": Path("output/encodings_yolov8.npy"),
+    "yolov11": Path("output/encodings_yolov11.npy"),
+    "retinaface": Path("output/encodings_retinaface.npy"),
+    "deepface": Path("output/encodings_deepface.npy"),
 }
 
 # Processed files paths for each model
 PROCESSED_FILES_PATHS = {
-    "yolov8": Path("output/processed_files_yolov8.pkl"),
-    "yolov11": Path("output/processed_files_yolov11.pkl"),
-    "retinaface": Path("output/processed_files_retinaface.pkl"),
-    "deepface": Path("output/processed_files_deepface.pkl"),
+    "yolov8": Path("output/processed_files_yolov8.sqlite"),
+    "yolov11": Path("output/processed_files_yolov11.sqlite"),
+    "retinaface": Path("output/processed_files_retinaface.sqlite"),
+    "deepface": Path("output/processed_files_deepface.sqlite"),
 }
 
 # Default model
 DEFAULT_MODEL = "yolov11"
+
+# Longest side (pixels) of the frame handed to the face detector
+DETECTION_MAX_SIDE = 640
+# Same for still test images, which often show smaller faces than the camera
+TEST_IMAGE_MAX_SIDE = 960
+# Same for training photos, which are usually close-up portraits
+TRAINING_IMAGE_MAX_SIDE = 800
+
+# Live recognition micro-batching: frames per detector call and max wait (seconds)
+DETECTION_BATCH_SIZE = 4
+DETECTION_BATCH_DEADLINE = 0.04
+# Sampled video frames handed to the detector per call when training
+VIDEO_BATCH_SIZE = 16
+# Threads decoding training images ahead of detection, and how many
+# images they may run ahead
+TRAINING_DECODE_WORKERS = min(4, os.cpu_count() or 1)
+TRAINING_DECODE_LOOKAHEAD = 2 * TRAINING_DECODE_WORKERS
+# Live recognition identity reuse: minimum box overlap, frames before a
+# tracked face is re-encoded, and frames before an unseen track is dropped
+TRACK_IOU_THRESHOLD = 0.8
+TRACK_REENCODE_FRAMES = 15
+TRACK_EVICT_FRAMES = 30
+# Live recognition motion gate: a due detection is skipped while no block of
+# a coarse grid over a small grayscale thumbnail changed by more than the
+# threshold (mean absolute difference within the block) since the last
+# detection, for at most this many frames. Blocks are 8x8 thumbnail pixels,
+# about the size of a face, so one moving face trips the gate on its own
+MOTION_THUMBNAIL_SIZE = (64, 48)
+MOTION_GRID_SIZE = (8, 6)
+MOTION_THRESHOLD = 10.0
+MOTION_MAX_SKIP_FRAMES = 30
+# Frames per second that the test-video window decodes and recognizes; the
+# frames in between are only grabbed, never decoded
+TEST_VIDEO_TARGET_FPS = 5
+# Decoded and recognized test-video frames buffered between pipeline stages
+TEST_VIDEO_PREFETCH = 3
+# Adaptive frame skipping: the per-frame budget at 30 FPS (ms) and the weight
+# of each new sample in the running average of measured inference time
+FRAME_BUDGET_MS = 33.0
+LATENCY_EWMA_ALPHA = 0.2
 TRAINING_DIR = Path("training")
 OUTPUT_DIR = Path("output")
 VALIDATION_DIR = Path("validation")
@@ -61,6 +382,35 @@ TRAINING_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 VALIDATION_DIR.mkdir(exist_ok=True)
 
+# App settings (API key and model/camera choices), and the plain-text key
+# file used before settings were stored together
+SETTINGS_PATH = OUTPUT_DIR / "settings.json"
+LEGACY_API_KEY_PATH = OUTPUT_DIR / "gemini_api_key.txt"
+
+# Training file types (lowercase, compared case-insensitively)
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+
+
+def _iter_training_files(training_dir=TRAINING_DIR):
+    """
+    Yield (person_name, os.DirEntry) for every training image and video.
+    
+    Walks the two-level training/<person>/<file> layout with os.scandir, whose
+    entries carry their type from the directory listing, so filtering needs no
+    extra stat call per file.
+    """
+    with os.scandir(training_dir) as person_entries:
+        for person_entry in person_entries:
+            if not person_entry.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(person_entry.path) as file_entries:
+                for file_entry in file_entries:
+                    extension = os.path.splitext(file_entry.name)[1].lower()
+                    if ((extension in IMAGE_EXTENSIONS or extension in VIDEO_EXTENSIONS)
+                            and file_entry.is_file(follow_symlinks=False)):
+                        yield person_entry.name, file_entry
+
 # Modern Minimal Dark Theme Colors
 COLORS = {
     "bg_primary": "#0f0f0f",      # Pure dark background
@@ -84,15 +434,107 @@ COLORS = {
 }
 
 
+@functools.lru_cache(maxsize=32)
+def _hex_to_rgb(hex_color):
+    """Convert hex color to RGB tuple."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+@functools.lru_cache(maxsize=32)
+def _lighten_color(color, amount=20):
+    """Lighten a hex color by specified amount."""
+    rgb = tuple(min(255, c + amount) for c in _hex_to_rgb(color))
+    return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
+
+
+# Hover/pressed shades for every theme color, computed once at import
+HOVER_COLORS = {color: _lighten_color(color, 16) for color in COLORS.values()}
+ACTIVE_COLORS = {color: _lighten_color(color, 32) for color in COLORS.values()}
+
+BUTTON_FONT_PATHS = (
+    "C:/Windows/Fonts/segoeui.ttf",
+    "C:/Windows/Fonts/segoeuib.ttf",  # Bold version
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",  # Bold version
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_button_font(font_size):
+    """Load the first available button font at the given size (None if none load)."""
+    for font_path in BUTTON_FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except:
+            continue
+    try:
+        return ImageFont.load_default()
+    except:
+        return None
+
+
+# Label fonts for test-image results, tried in order
+RESULT_FONT_PATHS = (
+    "arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_result_font(font_size):
+    """Load the test-image label font at the given size, parsed once per size."""
+    for font_path in RESULT_FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except:
+            continue
+    return ImageFont.load_default()
+
+
+class FramePreview:
+    """
+    Renders BGR camera frames into one fixed-size Tk image.
+
+    The resize target, the RGBA pixel buffer and the PhotoImage are allocated
+    once; each frame is resized and color-converted in place and pasted into
+    the existing PhotoImage.
+    """
+    
+    def __init__(self, size):
+        """
+        Args:
+            size: (width, height) of the displayed image
+        """
+        width, height = size
+        self.size = (width, height)
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._rgba = np.empty((height, width, 4), dtype=np.uint8)
+        # RGBA images created with frombuffer share memory with the array,
+        # so in-place conversions show up without another copy
+        self._image = Image.frombuffer("RGBA", self.size, self._rgba, "raw", "RGBA", 0, 1)
+        self.photo = None
+    
+    def render(self, frame):
+        """Update and return the PhotoImage for a BGR frame (main thread only)."""
+        cv2.resize(frame, self.size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGBA, dst=self._rgba)
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(self._image)
+        else:
+            self.photo.paste(self._image)
+        return self.photo
+
+
 class ModernButton(tk.Button):
     """Modern minimalistic button with smooth hover effects."""
     def __init__(self, parent, **kwargs):
         # Extract button properties
         self.button_text = kwargs.get('text', 'Button')
         self.text_color = "#ffffff"  # White text
-        self.bg_color = "#1a1a1a"  # Dark background
-        self.hover_bg = "#2a2a2a"  # Lighter on hover
-        self.active_bg = "#3a3a3a"  # Even lighter when pressed
+        self.bg_color = COLORS["bg_secondary"]  # Dark background
+        self.hover_bg = HOVER_COLORS.get(self.bg_color) or _lighten_color(self.bg_color, 16)  # Lighter on hover
+        self.active_bg = ACTIVE_COLORS.get(self.bg_color) or _lighten_color(self.bg_color, 32)  # Even lighter when pressed
         self.button_font = kwargs.get('font', ("Segoe UI", 14, "normal"))
         
         # Handle width - if it's a small number (<50), treat as character width, else pixels
@@ -158,11 +600,6 @@ class ModernButton(tk.Button):
         if self.command:
             self.config(command=self.command)
     
-    def _hex_to_rgb(self, hex_color):
-        """Convert hex color to RGB tuple."""
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
     def _create_button_image(self, bg_color):
         """Create modern minimalistic button image that fills the widget."""
         # Get actual widget size
@@ -194,7 +631,7 @@ class ModernButton(tk.Button):
         button_rect = [0, 0, width, height]
         
         # Background color with subtle gradient
-        bg_rgb = self._hex_to_rgb(bg_color)
+        bg_rgb = _hex_to_rgb(bg_color)
         draw.rounded_rectangle(button_rect, radius=self.radius, fill=(*bg_rgb, 255))
         
         # Subtle inner highlight (top edge)
@@ -220,30 +657,9 @@ class ModernButton(tk.Button):
         temp_img = Image.new('RGBA', (width + padding * 2, height + padding * 2), (0, 0, 0, 0))
         temp_draw = ImageDraw.Draw(temp_img)
         
-        # Font size
+        # Font size (fonts are loaded once per size and cached)
         font_size = self.button_font[1]
-        font = None
-        
-        # Try different font paths
-        font_paths = [
-            "C:/Windows/Fonts/segoeui.ttf",
-            "C:/Windows/Fonts/segoeuib.ttf",  # Bold version
-            "C:/Windows/Fonts/arial.ttf",
-            "C:/Windows/Fonts/arialbd.ttf",  # Bold version
-        ]
-        
-        for font_path in font_paths:
-            try:
-                font = ImageFont.truetype(font_path, font_size)
-                break
-            except:
-                continue
-        
-        if font is None:
-            try:
-                font = ImageFont.load_default()
-            except:
-                font = None
+        font = _load_button_font(font_size)
         
         if font is None:
             # Fallback: just return empty image
@@ -263,7 +679,7 @@ class ModernButton(tk.Button):
         x = (width + padding * 2 - text_width) // 2
         y = (height + padding * 2 - text_height) // 2
         
-        text_rgb = self._hex_to_rgb(self.text_color)
+        text_rgb = _hex_to_rgb(self.text_color)
         
         # Draw glow layers (multiple layers with increasing blur effect)
         glow_intensity = 5
@@ -302,12 +718,6 @@ class ModernButton(tk.Button):
         """Handle mouse release - show hover state."""
         self.config(image=self.hover_image)
     
-    def _lighten_color(self, color, amount=20):
-        """Lighten a hex color by specified amount."""
-        color = color.lstrip('#')
-        rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-        rgb = tuple(min(255, c + amount) for c in rgb)
-        return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
 
 
 class CustomDropdown(tk.Frame):
@@ -401,9 +811,9 @@ class CustomDropdown(tk.Frame):
             activestyle='none'
         )
         
-        # Add values to listbox
-        for value in self.values:
-            self.options_listbox.insert(tk.END, value)
+        # Add values to listbox (one Tcl call for all of them)
+        if self.values:
+            self.options_listbox.insert(tk.END, *self.values)
         
         # Bind events
         self.canvas.bind("<Button-1>", self._on_click)
@@ -537,17 +947,34 @@ class FaceRecognitionApp:
         self.camera_flip_horizontal = tk.BooleanVar(value=False)
         self.camera_flip_vertical = tk.BooleanVar(value=False)
         self.camera_rotate = tk.IntVar(value=0)  # 0, 90, 180, 270 degrees
+        self.detector_step = 3  # Run detection on every Nth camera frame
+        
+        # Plain-Python mirror of the camera variables, kept current by write
+        # traces so per-frame code (and worker threads) never call into Tk
+        self.camera_settings = {}
+        self._sync_camera_settings()
+        for variable in (self.camera_flip_horizontal, self.camera_flip_vertical,
+                         self.camera_rotate, self.detection_model, self.model_type):
+            variable.trace_add("write", self._sync_camera_settings)
         
         # Gemini Live API
         self.gemini_api_key = tk.StringVar(value="")
-        self.gemini_live_api: Optional[GeminiLiveAPI] = None
+        self.gemini_live_api: Optional["GeminiLiveAPI"] = None
         self.live_api_enabled = False
-        self.load_gemini_api_key()
+        self.load_app_settings()
         
         # Model-specific data
         self.loaded_encodings = {}  # Dict: {model_name: encodings}
+        self.galleries = {}  # Dict: {model_name: FaceGallery}, built on first match
+        self.pages = {}  # Dict: {page_name: tk.Frame}, built on first visit
+        self._person_count = {}  # Dict: {model_name: distinct people}, set when encodings change
+        self._encoding_counts = {}  # Dict: {model_name: Counter of encodings per person}, set with it
+        self._people_cache = {}  # Dict: {person_name: (folder mtime, file count)}
+        self._people_cache_mtime = -1  # TRAINING_DIR mtime the person list was read at
         self.processed_files = {}  # Dict: {model_name: set of files}
-        self.detectors = {}  # Cache detectors
+        self.detectors = OrderedDict()  # LRU cache of detectors, most recent last
+        self._detector_cache_size = 2  # Detectors kept loaded: toggling back stays warm, VRAM stays bounded
+        self._detector_lock = threading.RLock()  # Serializes detector construction
         
         # DeepFace calibration
         self.deepface_calibrator = None
@@ -564,12 +991,17 @@ class FaceRecognitionApp:
         self.load_all_encodings()
         self.load_all_processed_files()
         
+        # Load dlib's encoder in the background so the first face is fast
+        threading.Thread(target=self._warm_encoder, daemon=True).start()
+        
         # Create UI
         self.create_homepage()
     
     def setup_modern_styles(self):
-        """Configure modern ttk styles for dropdowns and widgets."""
-        style = ttk.Style()
+        """Configure modern ttk styles for dropdowns and widgets (once per app)."""
+        if getattr(self, "style", None) is not None:
+            return self.style
+        style = self.style = ttk.Style()
         style.theme_use('clam')  # Use clam as base theme
         
         # Modern Combobox style
@@ -609,6 +1041,7 @@ class FaceRecognitionApp:
             lightcolor=[('focus', COLORS['accent_blue'])],
             darkcolor=[('focus', COLORS['accent_blue'])]
         )
+        return style
     
     def center_window(self):
         """Center the window on the screen."""
@@ -619,66 +1052,149 @@ class FaceRecognitionApp:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
     
+    def _sync_camera_settings(self, *_args):
+        """Copy the camera Tk variables into self.camera_settings (trace callback)."""
+        self.camera_settings.update(
+            flip_horizontal=self.camera_flip_horizontal.get(),
+            flip_vertical=self.camera_flip_vertical.get(),
+            rotation=self.camera_rotate.get(),
+            detection_model=self.detection_model.get(),
+            encoding_model="small" if self.model_type.get() == "hog" else "large",
+        )
+        self.camera_settings["orient"] = _orientation_function(
+            self.camera_settings["flip_horizontal"],
+            self.camera_settings["flip_vertical"],
+            self.camera_settings["rotation"],
+        )
+    
     def load_all_encodings(self):
         """Load face encodings for all models."""
+        self.galleries.clear()
         for model_name, encodings_path in ENCODINGS_PATHS.items():
             try:
-                if encodings_path.exists():
-                    with encodings_path.open(mode="rb") as f:
-                        self.loaded_encodings[model_name] = pickle.load(f)
-                else:
-                    self.loaded_encodings[model_name] = None
+                self.loaded_encodings[model_name] = load_encodings(encodings_path)
             except Exception as e:
                 print(f"Error loading encodings for {model_name}: {e}")
                 self.loaded_encodings[model_name] = None
+            self._set_person_count(model_name)
+    
+    def _set_person_count(self, model_name):
+        """Recount the people (and their encodings) for a model after its encodings change."""
+        current_encodings = self.loaded_encodings.get(model_name)
+        if current_encodings:
+            counts = Counter(current_encodings.get("names", []))
+            self._encoding_counts[model_name] = counts
+            self._person_count[model_name] = len(counts)
+        else:
+            self._encoding_counts.pop(model_name, None)
+            self._person_count.pop(model_name, None)
+    
+    def _open_processed_files_db(self, processed_path):
+        """Open (creating if needed) the SQLite database of processed file keys."""
+        connection = sqlite3.connect(processed_path)
+        connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY)")
+        return connection
     
     def load_all_processed_files(self):
         """Load processed files for all models."""
         for model_name, processed_path in PROCESSED_FILES_PATHS.items():
             try:
+                legacy_path = processed_path.with_suffix(".pkl")
+                if not processed_path.exists() and legacy_path.exists():
+                    # Migrate the old pickled set once
+                    with legacy_path.open(mode="rb") as f:
+                        legacy_files = pickle.load(f)
+                    with closing(self._open_processed_files_db(processed_path)) as connection:
+                        with connection:
+                            connection.executemany(
+                                "INSERT OR IGNORE INTO files VALUES (?)",
+                                ((file_key,) for file_key in legacy_files)
+                            )
+                    print(f"✓ Migrated {legacy_path} to {processed_path}")
+                
                 if processed_path.exists():
-                    with processed_path.open(mode="rb") as f:
-                        self.processed_files[model_name] = pickle.load(f)
+                    with closing(self._open_processed_files_db(processed_path)) as connection:
+                        self.processed_files[model_name] = {
+                            row[0] for row in connection.execute("SELECT path FROM files")
+                        }
                 else:
                     self.processed_files[model_name] = set()
             except Exception as e:
                 print(f"Error loading processed files for {model_name}: {e}")
                 self.processed_files[model_name] = set()
     
-    def save_processed_files(self, model_name=None):
-        """Save list of processed files for a specific model."""
+    def save_processed_files(self, model_name=None, file_keys=None):
+        """
+        Record processed files for a specific model.
+        
+        Only ``file_keys`` are appended when given; otherwise the whole
+        in-memory set is written (existing rows are left untouched).
+        """
         if model_name is None:
             model_name = self.detection_model.get()
+        if file_keys is None:
+            file_keys = self.processed_files.get(model_name, set())
         
         try:
             processed_path = PROCESSED_FILES_PATHS[model_name]
-            with processed_path.open(mode="wb") as f:
-                pickle.dump(self.processed_files.get(model_name, set()), f)
+            with closing(self._open_processed_files_db(processed_path)) as connection:
+                with connection:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO files VALUES (?)",
+                        ((file_key,) for file_key in file_keys)
+                    )
         except Exception as e:
             print(f"Error saving processed files for {model_name}: {e}")
     
     def get_current_encodings(self):
         """Get encodings for current detection model."""
-        model_name = self.detection_model.get()
+        # Read the traced mirror: this is also called from worker threads
+        model_name = self.camera_settings["detection_model"]
         return self.loaded_encodings.get(model_name)
     
+    def get_current_gallery(self):
+        """Get the matching gallery for current detection model, building it on first use."""
+        model_name = self.camera_settings["detection_model"]
+        gallery = self.galleries.get(model_name)
+        if gallery is None:
+            current_encodings = self.loaded_encodings.get(model_name)
+            if not current_encodings:
+                return None
+            gallery = FaceGallery(
+                current_encodings["names"],
+                current_encodings["encodings"],
+                encodings_path=ENCODINGS_PATHS[model_name],
+                sq_norms=current_encodings.get("sq_norms"),
+            )
+            self.galleries[model_name] = gallery
+        return gallery
+    
     def get_current_processed_files(self):
         """Get processed files for current detection model."""
         model_name = self.detection_model.get()
         return self.processed_files.get(model_name, set())
     
-    def get_detector(self):
-        """Get detector for current model. Only loads the selected model."""
-        model_name = self.detection_model.get()
+    def get_detector(self, model_name=None):
+        """Get detector for a model (the selected one by default). Only loads that model."""
+        if model_name is None:
+            model_name = self.camera_settings["detection_model"]
         
+        with self._detector_lock:
+            return self._load_detector(model_name)
+    
+    def _load_detector(self, model_name):
+        """Construct and cache a detector; callers must hold _detector_lock."""
         # Only load the selected model (unloading is handled in on_model_change)
         if model_name not in self.detectors:
             if model_name == "yolov8":
+                from yolov8_detector import YOLOv8FaceDetector
                 self.detectors[model_name] = YOLOv8FaceDetector()
             elif model_name == "yolov11":
+                from yolo_face_detector import YOLOFaceDetector
                 self.detectors[model_name] = YOLOFaceDetector()
             elif model_name == "retinaface":
                 try:
+                    from retinaface_detector import RetinaFaceDetector
                     self.detectors[model_name] = RetinaFaceDetector()
                 except ImportError:
                     raise ImportError(
@@ -686,25 +1202,100 @@ class FaceRecognitionApp:
                     )
             elif model_name == "deepface":
                 try:
+                    from deepface_detector import DeepFaceDetector
                     self.detectors[model_name] = DeepFaceDetector()
                 except ImportError:
                     raise ImportError(
                         "DeepFace is not installed. Please install it with: pip install deepface"
                     )
         
+        self.detectors.move_to_end(model_name)
+        while len(self.detectors) > self._detector_cache_size:
+            evicted_name, evicted = self.detectors.popitem(last=False)
+            self._release_detector(evicted_name, evicted)
         return self.detectors[model_name]
     
-    def clear_frame(self):
-        """Clear all widgets from the main frame."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+    def _release_detector(self, model_name, detector):
+        """Free an evicted detector's model weights and cached GPU memory."""
+        try:
+            if hasattr(detector, 'model'):
+                del detector.model
+        except Exception:
+            pass
+        del detector
+        gc.collect()
+        # Only touch torch if a detector already imported it
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print(f"✓ Unloaded {model_name} detector")
+    
+    def _warm_detector(self, model_name):
+        """Load a detector and run one dummy inference so the first real frame is fast."""
+        try:
+            with self._detector_lock:
+                if model_name in self.detectors:
+                    return
+                detector = self._load_detector(model_name)
+                # The first forward pass initializes the CUDA context and kernels
+                detector.detect_faces(
+                    np.zeros((DETECTION_MAX_SIDE, DETECTION_MAX_SIDE, 3), dtype=np.uint8)
+                )
+                if hasattr(detector, "build_attribute_models"):
+                    # Emotion/age/gender/race weights are loaded on first analysis otherwise
+                    detector.build_attribute_models()
+            if hasattr(detector, "build_fallback_detector"):
+                # Fetch the OpenCV fallback model here, outside the detector
+                # lock, rather than in the middle of detection
+                detector.build_fallback_detector()
+            print(f"✓ {model_name.upper()} detector ready")
+        except Exception as e:
+            print(f"⚠ Could not prewarm {model_name} detector: {e}")
+    
+    def _warm_encoder(self):
+        """Load the face encoder with one dummy encoding and report whether dlib uses CUDA."""
+        try:
+            face_recognition = _lazy_import("face_recognition")
+            face_recognition.face_encodings(
+                np.zeros((150, 150, 3), dtype=np.uint8), [(0, 150, 150, 0)],
+                model=self.camera_settings["encoding_model"]
+            )
+            # dlib runs its encoder network on the GPU by itself when it was
+            # built with CUDA; there is no per-call switch
+            if getattr(_lazy_import("dlib"), "DLIB_USE_CUDA", False):
+                print("✓ Face encoder ready (dlib CUDA - GPU)")
+            else:
+                print("✓ Face encoder ready (CPU - see DLIB_FIX.md for GPU encoding)")
+        except Exception as e:
+            print(f"⚠ Could not prewarm face encoder: {e}")
+    
+    def _show_page(self, name, builder):
+        """
+        Show a page, building its widgets the first time it is opened.
+
+        Pages are kept alive and swapped with pack_forget() instead of being
+        destroyed and rebuilt on every navigation.
+        """
+        page = self.pages.get(name)
+        if page is None:
+            page = tk.Frame(self.root, bg=COLORS["bg_primary"])
+            builder(page)
+            self.pages[name] = page
+        for other_name, other_page in self.pages.items():
+            if other_name != name:
+                other_page.pack_forget()
+        page.pack(fill=tk.BOTH, expand=True)
+        return page
     
     def create_homepage(self):
-        """Create the main homepage with modern dark theme."""
-        self.clear_frame()
-        
+        """Show the main homepage."""
+        self._show_page("home", self._build_homepage)
+        self._update_homepage_status()
+    
+    def _build_homepage(self, parent):
+        """Build the main homepage with modern dark theme."""
         # Header with gradient effect
-        header_frame = tk.Frame(self.root, bg=COLORS["bg_secondary"], height=120)
+        header_frame = tk.Frame(parent, bg=COLORS["bg_secondary"], height=120)
         header_frame.pack(fill=tk.X)
         header_frame.pack_propagate(False)
         
@@ -722,7 +1313,7 @@ class FaceRecognitionApp:
         title_label.pack()
         
         # Main content frame
-        content_frame = tk.Frame(self.root, bg=COLORS["bg_primary"])
+        content_frame = tk.Frame(parent, bg=COLORS["bg_primary"])
         content_frame.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
         
         # Model Selection Card
@@ -745,26 +1336,10 @@ class FaceRecognitionApp:
             fg=COLORS["text_primary"]
         ).pack(side=tk.LEFT, padx=(0, 12))
         
-        # Check if RetinaFace is available
-        retinaface_available = False
-        try:
-            import retinaface
-            retinaface_available = True
-        except:
-            pass
-        
-        # Check if DeepFace is available
-        deepface_available = False
-        try:
-            import deepface
-            deepface_available = True
-        except:
-            pass
-        
         model_options_home = ["yolov11", "yolov8"]
-        if retinaface_available:
+        if RETINAFACE_AVAILABLE:
             model_options_home.append("retinaface")
-        if deepface_available:
+        if DEEPFACE_AVAILABLE:
             model_options_home.append("deepface")
         
         model_combo_home = ttk.Combobox(
@@ -796,8 +1371,9 @@ class FaceRecognitionApp:
                 "deepface": "Face recognition + Emotion/Age/Race/Gender"
             }
             model_desc_home.config(text=desc_map.get(model_name, ""))
-            # Unload other models
-            self.root.after_idle(lambda: self._unload_other_models(model_name))
+            # Load the selected model in the background instead of on first use
+            # (the previous one is evicted from the detector cache)
+            threading.Thread(target=self._warm_detector, args=(model_name,), daemon=True).start()
             # Update status
             self.root.after(100, lambda: self._update_homepage_status())
         
@@ -941,11 +1517,16 @@ class FaceRecognitionApp:
         buttons_container.grid_rowconfigure(3, weight=1)
     
     def show_training_page(self):
-        """Show the training page with modern dark theme."""
-        self.clear_frame()
+        """Show the training page."""
+        self._show_page("training", self._build_training_page)
+        self.update_people_list()
+        self._update_model_status(self.detection_model.get())
+    
+    def _build_training_page(self, parent):
+        """Build the training page with modern dark theme."""
         
         # Header
-        header_frame = tk.Frame(self.root, bg=COLORS["bg_secondary"], height=80)
+        header_frame = tk.Frame(parent, bg=COLORS["bg_secondary"], height=80)
         header_frame.pack(fill=tk.X)
         header_frame.pack_propagate(False)
         
@@ -973,7 +1554,7 @@ class FaceRecognitionApp:
         title_label.pack(side=tk.LEFT, padx=24, pady=20)
         
         # Main content
-        content_frame = tk.Frame(self.root, bg=COLORS["bg_primary"])
+        content_frame = tk.Frame(parent, bg=COLORS["bg_primary"])
         content_frame.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
         
         # Left panel - Add Person
@@ -1098,32 +1679,11 @@ class FaceRecognitionApp:
         model_dropdown_frame = tk.Frame(right_card, bg=COLORS["bg_secondary"])
         model_dropdown_frame.pack(fill=tk.X, padx=20, pady=5)
         
-        # Check if RetinaFace is available (lazy check - don't load model)
-        retinaface_available = False
-        retinaface_error = None
-        try:
-            # Just check if module can be imported, don't create detector
-            import retinaface
-            retinaface_available = True
-        except ImportError as e:
-            retinaface_available = False
-            retinaface_error = str(e)
-        except Exception as e:
-            retinaface_available = False
-            retinaface_error = f"{type(e).__name__}: {str(e)}"
-        
-        # Check if DeepFace is available
-        deepface_available = False
-        deepface_error = None
-        try:
-            import deepface
-            deepface_available = True
-        except ImportError as e:
-            deepface_available = False
-            deepface_error = str(e)
-        except Exception as e:
-            deepface_available = False
-            deepface_error = f"{type(e).__name__}: {str(e)}"
+        # Availability comes from module-spec lookups done once at startup;
+        # import errors (e.g. missing tf-keras) are reported when training starts
+        retinaface_available = RETINAFACE_AVAILABLE
+        retinaface_error = None if retinaface_available else "retina-face package is not installed"
+        deepface_available = DEEPFACE_AVAILABLE
         
         model_options = [
             ("YOLOv11", "yolov11", "Latest YOLO, best accuracy"),
@@ -1201,8 +1761,6 @@ class FaceRecognitionApp:
         
         def on_model_change(*args):
             model_name = self.detection_model.get()
-            # Unload other models when switching (non-blocking)
-            self.root.after_idle(lambda: self._unload_other_models(model_name))
             # Update status (non-blocking)
             self.root.after(100, lambda: self._update_model_status(model_name))
             # Update model info
@@ -1342,10 +1900,12 @@ class FaceRecognitionApp:
             )
             return
         
-        self.clear_frame()
-        
+        self._show_page("deepface_calibration", self._build_deepface_calibration_page)
+    
+    def _build_deepface_calibration_page(self, parent):
+        """Build the DeepFace calibration page."""
         # Header
-        header_frame = tk.Frame(self.root, bg=COLORS["bg_secondary"], height=80)
+        header_frame = tk.Frame(parent, bg=COLORS["bg_secondary"], height=80)
         header_frame.pack(fill=tk.X)
         header_frame.pack_propagate(False)
         
@@ -1373,7 +1933,7 @@ class FaceRecognitionApp:
         title_label.pack(side=tk.LEFT, padx=24, pady=20)
         
         # Main content
-        content_frame = tk.Frame(self.root, bg=COLORS["bg_primary"])
+        content_frame = tk.Frame(parent, bg=COLORS["bg_primary"])
         content_frame.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
         
         # Info card
@@ -1556,28 +2116,14 @@ class FaceRecognitionApp:
             messagebox.showerror("Training Error", f"Error during training:\n\n{str(e)}")
             self.deepface_status.config(text="Training failed", fg=COLORS["error"])
     
-    def _unload_other_models(self, current_model):
-        """Unload models that are not currently selected."""
-        for other_model in list(self.detectors.keys()):
-            if other_model != current_model:
-                try:
-                    detector = self.detectors[other_model]
-                    if hasattr(detector, 'model'):
-                        del detector.model
-                    del self.detectors[other_model]
-                except:
-                    pass
-        # Keep only current model in cache
-        if current_model not in self.detectors:
-            self.detectors = {}
-        else:
-            self.detectors = {current_model: self.detectors[current_model]}
+    def _count_current_people(self):
+        """Number of distinct people trained for the current model, or None if untrained."""
+        return self._person_count.get(self.detection_model.get())
     
     def _update_model_status(self, model_name):
         """Update model status (called asynchronously to avoid lag)."""
-        current_encodings = self.get_current_encodings()
-        if current_encodings:
-            num_people = len(set(current_encodings.get("names", [])))
+        num_people = self._count_current_people()
+        if num_people is not None:
             self.training_status.config(
                 text=f"✓ {model_name.upper()} model selected - {num_people} person(s) trained",
                 fg=COLORS["success"]
@@ -1592,9 +2138,8 @@ class FaceRecognitionApp:
         """Update homepage status label."""
         if hasattr(self, 'status_label'):
             try:
-                current_encodings = self.get_current_encodings()
-                if current_encodings:
-                    num_people = len(set(current_encodings.get("names", [])))
+                num_people = self._count_current_people()
+                if num_people is not None:
                     model_name = self.detection_model.get().upper()
                     status_text = f"✓ {model_name} Active - {num_people} person(s) registered"
                     status_color = COLORS["success"]
@@ -1628,19 +2173,86 @@ class FaceRecognitionApp:
             filetypes=filetypes
         )
         
-        if files:
+        if not files:
+            return
+        
+        def copy_thread():
             copied = 0
-            for file_path in files:
-                try:
-                    filename = os.path.basename(file_path)
-                    dest_path = person_dir / filename
-                    shutil.copy2(file_path, dest_path)
+            errors = []
+            pairs = [(file_path, person_dir / os.path.basename(file_path)) for file_path in files]
+            for (file_path, _), error in zip(pairs, _copy_files(pairs)):
+                if error is None:
                     copied += 1
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to copy {filename}: {str(e)}")
+                else:
+                    errors.append((os.path.basename(file_path), str(error)))
+            
+            def on_done():
+                # One summary dialog instead of a modal popup per failed file
+                if errors:
+                    details = "\n".join(f"{name}: {message}" for name, message in errors[:10])
+                    if len(errors) > 10:
+                        details += f"\n... and {len(errors) - 10} more"
+                    messagebox.showerror("Errors", f"Failed to copy {len(errors)} file(s):\n\n{details}")
+                messagebox.showinfo("Success", f"Added {copied} photo(s) for {person_name}")
+                self.update_people_list()
+            
+            self.root.after(0, on_done)
+        
+        threading.Thread(target=copy_thread, daemon=True).start()
+    
+    def add_video_for_person(self, person_name):
+        """Open file dialog to add a video for a person, saving sampled frames as photos."""
+        if not person_name or not person_name.strip():
+            messagebox.showerror("Error", "Please enter a person name first!")
+            return
+        
+        person_name = person_name.strip().replace(" ", "_")
+        person_dir = TRAINING_DIR / person_name
+        person_dir.mkdir(exist_ok=True)
+        
+        filetypes = [
+            ("Video files", "*.mp4 *.avi *.mov *.mkv"),
+            ("All files", "*.*")
+        ]
+        
+        video_path = filedialog.askopenfilename(
+            title="Select Video",
+            filetypes=filetypes
+        )
+        
+        if not video_path:
+            return
+        
+        self.training_status.config(
+            text=f"Extracting frames from {os.path.basename(video_path)}...",
+            fg=COLORS["warning"]
+        )
+        
+        def extract_thread():
+            try:
+                extracted = extract_frames_from_video(
+                    video_path, person_dir, frames_per_second=2,
+                    prefix=Path(video_path).stem
+                )
+            except Exception as e:
+                self.root.after(0, lambda err=str(e): messagebox.showerror(
+                    "Error", f"Failed to extract frames:\n\n{err}"
+                ))
+                self.root.after(0, lambda: self.training_status.config(
+                    text="Frame extraction failed", fg=COLORS["error"]
+                ))
+                return
+            
+            def on_done():
+                self._update_model_status(self.detection_model.get())
+                messagebox.showinfo(
+                    "Success", f"Added {extracted} frame(s) from video for {person_name}"
+                )
+                self.update_people_list()
             
-            messagebox.showinfo("Success", f"Added {copied} photo(s) for {person_name}")
-            self.update_people_list()
+            self.root.after(0, on_done)
+        
+        threading.Thread(target=extract_thread, daemon=True).start()
     
     def import_from_folder(self):
         """Import photos from a folder structure where subfolders are person names."""
@@ -1681,7 +2293,6 @@ class FaceRecognitionApp:
         
         def import_thread():
             try:
-                image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.JPG', '.JPEG', '.PNG', '.BMP'}
                 total_copied = 0
                 people_imported = []
                 
@@ -1692,44 +2303,51 @@ class FaceRecognitionApp:
                     
                     # Find all image files in subfolder
                     image_files = [f for f in subfolder.iterdir() 
-                                 if f.is_file() and f.suffix in image_extensions]
+                                 if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS]
                     
                     if not image_files:
                         continue
                     
-                    copied = 0
+                    pairs = []
                     for image_file in image_files:
-                        try:
-                            # Copy to training directory
-                            dest_path = person_dir / image_file.name
-                            # If file exists, add timestamp to avoid overwrite
-                            if dest_path.exists():
-                                stem = dest_path.stem
-                                suffix = dest_path.suffix
-                                dest_path = person_dir / f"{stem}_imported{suffix}"
-                            
-                            shutil.copy2(image_file, dest_path)
+                        # Copy to training directory
+                        dest_path = person_dir / image_file.name
+                        # If file exists, add timestamp to avoid overwrite
+                        if dest_path.exists():
+                            stem = dest_path.stem
+                            suffix = dest_path.suffix
+                            dest_path = person_dir / f"{stem}_imported{suffix}"
+                        pairs.append((image_file, dest_path))
+                    
+                    copied = 0
+                    for (image_file, _), error in zip(pairs, _copy_files(pairs)):
+                        if error is None:
                             copied += 1
                             total_copied += 1
-                        except Exception as e:
-                            print(f"Error copying {image_file}: {e}")
+                        else:
+                            print(f"Error copying {image_file}: {error}")
                     
                     if copied > 0:
                         people_imported.append(f"{person_name} ({copied} photos)")
                 
-                progress_window.destroy()
+                def on_done():
+                    progress_window.destroy()
+                    if total_copied > 0:
+                        msg = f"Successfully imported {total_copied} photo(s) from {len(people_imported)} person(s):\n\n"
+                        msg += "\n".join(people_imported)
+                        messagebox.showinfo("Import Complete", msg)
+                        self.update_people_list()
+                    else:
+                        messagebox.showwarning("Warning", "No image files found in subfolders!")
                 
-                if total_copied > 0:
-                    msg = f"Successfully imported {total_copied} photo(s) from {len(people_imported)} person(s):\n\n"
-                    msg += "\n".join(people_imported)
-                    messagebox.showinfo("Import Complete", msg)
-                    self.update_people_list()
-                else:
-                    messagebox.showwarning("Warning", "No image files found in subfolders!")
+                self.root.after(0, on_done)
                     
             except Exception as e:
-                progress_window.destroy()
-                messagebox.showerror("Error", f"Failed to import folder: {str(e)}")
+                def on_error(err=str(e)):
+                    progress_window.destroy()
+                    messagebox.showerror("Error", f"Failed to import folder: {err}")
+                
+                self.root.after(0, on_error)
         
         threading.Thread(target=import_thread, daemon=True).start()
     
@@ -1739,13 +2357,52 @@ class FaceRecognitionApp:
             return  # People listbox not created yet
         self.people_listbox.delete(0, tk.END)
         if TRAINING_DIR.exists():
-            for person_dir in TRAINING_DIR.iterdir():
-                if person_dir.is_dir():
-                    num_photos = len(list(person_dir.glob("*")))
-                    self.people_listbox.insert(
-                        tk.END,
-                        f"{person_dir.name} ({num_photos} photos)"
+            entries = [
+                f"{person_name} ({num_photos} photos)"
+                for person_name, num_photos in self._scan_people()
+            ]
+            if entries:
+                self.people_listbox.insert(tk.END, *entries)
+    
+    def _scan_people(self):
+        """
+        Return [(person_name, file_count)] for the training directory.
+        
+        The person list is only re-read when TRAINING_DIR's mtime changes, and
+        a person's files are only recounted when their folder's mtime changes
+        (adding or deleting photos updates it), so unchanged folders cost one
+        stat instead of a full listing.
+        """
+        top_mtime = os.stat(TRAINING_DIR).st_mtime_ns
+        if top_mtime != self._people_cache_mtime:
+            with os.scandir(TRAINING_DIR) as person_entries:
+                person_names = [
+                    person_entry.name for person_entry in person_entries
+                    if person_entry.is_dir(follow_symlinks=False)
+                ]
+            self._people_cache = {
+                person_name: self._people_cache.get(person_name, (None, 0))
+                for person_name in person_names
+            }
+            self._people_cache_mtime = top_mtime
+        
+        people = []
+        for person_name, (cached_mtime, num_photos) in list(self._people_cache.items()):
+            person_path = os.path.join(TRAINING_DIR, person_name)
+            try:
+                person_mtime = os.stat(person_path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if person_mtime != cached_mtime:
+                # Count names straight from the listing (hidden files are
+                # skipped, as glob("*") did)
+                with os.scandir(person_path) as file_entries:
+                    num_photos = sum(
+                        1 for entry in file_entries if not entry.name.startswith(".")
                     )
+                self._people_cache[person_name] = (person_mtime, num_photos)
+            people.append((person_name, num_photos))
+        return people
     
     def delete_person(self):
         """Delete selected person and their photos."""
@@ -1768,6 +2425,20 @@ class FaceRecognitionApp:
     
     def convert_image_to_rgb(self, image_path):
         """Convert image to RGB format."""
+        # OpenCV decodes JPEG/PNG with SIMD; imdecode (rather than imread)
+        # also handles non-ASCII paths on Windows. EXIF orientation is
+        # ignored to match what Pillow returned before.
+        try:
+            bgr_image = cv2.imdecode(
+                np.fromfile(str(image_path), dtype=np.uint8),
+                cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+            )
+        except (OSError, cv2.error):
+            bgr_image = None
+        if bgr_image is not None:
+            return cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
+        
+        # Formats OpenCV cannot decode (e.g. GIF on older builds)
         pil_image = Image.open(image_path)
         if pil_image.mode != 'RGB':
             pil_image = pil_image.convert('RGB')
@@ -1848,6 +2519,7 @@ class FaceRecognitionApp:
                 encoding_model_type = self.model_type.get()  # "hog" or "cnn"
                 # Map to face_recognition encoding model: HOG -> small (faster), CNN -> large (more accurate)
                 encoding_model = "small" if encoding_model_type == "hog" else "large"
+                face_recognition = _lazy_import("face_recognition")
                 
                 # Get detector early to catch any errors
                 try:
@@ -1879,34 +2551,14 @@ class FaceRecognitionApp:
                 skipped_count = 0
                 error_count = 0
                 error_files = []
+                new_file_keys = []  # Files processed in this session
                 
-                image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.JPG', '.JPEG', '.PNG', '.BMP'}
-                video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.MP4', '.AVI', '.MOV', '.MKV'}
-                all_files = list(TRAINING_DIR.glob("*/*"))
-                
-                # Filter files to process
-                files_to_process = []
-                for f in all_files:
-                    if f.is_file() and (f.suffix in image_extensions or f.suffix in video_extensions):
-                        # For incremental training, check if file is new or modified
-                        file_key = str(f.relative_to(TRAINING_DIR))
-                        processed_files_set = self.get_current_processed_files()
-                        if incremental and file_key in processed_files_set:
-                            # Check if file was modified
-                            try:
-                                if f.exists():
-                                    current_mtime = f.stat().st_mtime
-                                    # If file was modified, reprocess it
-                                    if file_key not in self.processed_files or True:  # Always check
-                                        files_to_process.append((f, file_key))
-                                    else:
-                                        skipped_count += 1
-                                else:
-                                    skipped_count += 1
-                            except:
-                                files_to_process.append((f, file_key))
-                        else:
-                            files_to_process.append((f, file_key))
+                # Files to process, keyed relative to the training directory
+                # (already-processed files are currently always reprocessed)
+                files_to_process = [
+                    (Path(entry.path), os.path.join(person_name, entry.name))
+                    for person_name, entry in _iter_training_files()
+                ]
                 
                 total_files = len(files_to_process)
                 
@@ -1918,7 +2570,7 @@ class FaceRecognitionApp:
                             "All files are already trained! No new files to process."
                         ))
                         self.root.after(0, lambda: self.training_status.config(
-                            text=f"✓ All files trained ({len(set(names))} person(s))",
+                            text=f"✓ All files trained ({self._person_count.get(model_name, 0)} person(s))",
                             fg=COLORS["success"]
                         ))
                     else:
@@ -1929,81 +2581,142 @@ class FaceRecognitionApp:
                         self.root.after(0, lambda: self.training_status.config(text="", fg=COLORS["success"]))
                     return
                 
-                for filepath, file_key in files_to_process:
+                # Images with detected faces waiting to be encoded as one batch:
+                # (filepath, file_key, name, image, face_locations)
+                pending_images = []
+                
+                def record_image_encodings(filepath, file_key, name, face_encodings):
+                    nonlocal processed_count, new_count, error_count
+                    if not face_encodings:
+                        error_count += 1
+                        error_files.append(f"{filepath.name} (encoding failed)")
+                        return
+                    
+                    for encoding in face_encodings:
+                        names.append(name)
+                        encodings.append(encoding)
+                    
+                    processed_count += 1
+                    new_count += 1
+                    # Mark file as processed
+                    if model_name not in self.processed_files:
+                        self.processed_files[model_name] = set()
+                    self.processed_files[model_name].add(file_key)
+                    new_file_keys.append(file_key)
+                
+                def encode_pending_images():
+                    nonlocal error_count
+                    if not pending_images:
+                        return
+                    batch = list(pending_images)
+                    pending_images.clear()
+                    
+                    # Use the encoding model selected by user (HOG -> small, CNN -> large)
+                    try:
+                        batch_encodings = batch_face_encodings(
+                            [item[3] for item in batch], [item[4] for item in batch],
+                            model=encoding_model
+                        )
+                    except Exception as e:
+                        print(f"Batched encoding failed, encoding images one by one: {e}")
+                        batch_encodings = None
+                    
+                    for index, (filepath, file_key, name, image, face_locations) in enumerate(batch):
+                        if batch_encodings is not None:
+                            face_encodings = batch_encodings[index]
+                        else:
+                            try:
+                                face_encodings = face_recognition.face_encodings(
+                                    image, face_locations, model=encoding_model
+                                )
+                            except Exception as e:
+                                error_count += 1
+                                error_files.append(f"{filepath.name}: {str(e)}")
+                                print(f"Error processing {filepath}: {e}")
+                                continue
+                        record_image_encodings(filepath, file_key, name, face_encodings)
+                
+                # Decode upcoming images on worker threads (OpenCV releases the
+                # GIL) while this thread runs detection and encoding, which
+                # share one detector and are not thread-safe
+                decode_pool = ThreadPoolExecutor(max_workers=TRAINING_DECODE_WORKERS)
+                decoded_images = {}  # Dict: {position in files_to_process: Future}
+                
+                def prefetch_images(position):
+                    end = min(position + TRAINING_DECODE_LOOKAHEAD, len(files_to_process))
+                    for ahead in range(position, end):
+                        ahead_path = files_to_process[ahead][0]
+                        if ahead not in decoded_images and ahead_path.suffix.lower() in IMAGE_EXTENSIONS:
+                            decoded_images[ahead] = decode_pool.submit(
+                                self.convert_image_to_rgb, ahead_path
+                            )
+                
+                for position, (filepath, file_key) in enumerate(files_to_process):
                     name = filepath.parent.name
+                    suffix = filepath.suffix.lower()
+                    prefetch_images(position)
                     try:
-                        if filepath.suffix.lower() in [ext.lower() for ext in image_extensions]:
+                        if suffix in IMAGE_EXTENSIONS:
                             # Process image
-                            image = self.convert_image_to_rgb(filepath)
+                            image = decoded_images.pop(position).result()
                             
-                            # Detector already loaded at start of thread
-                            face_locations = detector.detect_faces(image)
+                            # Detector already loaded at start of thread; detect on
+                            # a downscaled copy, encode from the full image
+                            small_image, detection_scale = _downscale_for_detection(
+                                image, TRAINING_IMAGE_MAX_SIDE
+                            )
+                            face_locations = _scale_face_locations(
+                                detector.detect_faces(small_image), detection_scale
+                            )
                             
                             if not face_locations:
                                 error_count += 1
                                 error_files.append(f"{filepath.name} (no face detected)")
                                 continue
                             
-                            # Use the encoding model selected by user (HOG -> small, CNN -> large)
-                            face_encodings = face_recognition.face_encodings(
-                                image, face_locations, model=encoding_model
-                            )
-                            
-                            if not face_encodings:
-                                error_count += 1
-                                error_files.append(f"{filepath.name} (encoding failed)")
-                                continue
-                            
-                            for encoding in face_encodings:
-                                names.append(name)
-                                encodings.append(encoding)
-                            
-                            processed_count += 1
-                            new_count += 1
-                            # Mark file as processed
-                            if model_name not in self.processed_files:
-                                self.processed_files[model_name] = set()
-                            self.processed_files[model_name].add(file_key)
+                            # Encode faces once a batch of images is ready
+                            pending_images.append((filepath, file_key, name, image, face_locations))
+                            if len(pending_images) >= ENCODING_BATCH_SIZE:
+                                encode_pending_images()
                         
-                        elif filepath.suffix.lower() in [ext.lower() for ext in video_extensions]:
-                            # Process video - extract frames
+                        elif suffix in VIDEO_EXTENSIONS:
+                            # Process video - sample 2 frames per second and
+                            # detect faces a batch of frames at a time
                             # Detector already loaded at start of thread
-                            frame_count = 0
                             frames_processed = 0
                             
-                            cap = cv2.VideoCapture(str(filepath))
-                            if not cap.isOpened():
-                                error_count += 1
-                                error_files.append(f"{filepath.name} (could not open)")
-                                continue
-                            
-                            fps = cap.get(cv2.CAP_PROP_FPS)
-                            frame_interval = max(1, int(fps / 2))  # Extract 2 frames per second
-                            
-                            while True:
-                                ret, frame = cap.read()
-                                if not ret:
-                                    break
-                                
-                                if frame_count % frame_interval == 0:
-                                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                                    
-                                    face_locations = detector.detect_faces(rgb_frame)
-                                    
-                                    if face_locations:
-                                        # Use the encoding model selected by user (HOG -> small, CNN -> large)
-                                        face_encodings = face_recognition.face_encodings(
-                                            rgb_frame, face_locations, model=encoding_model
-                                        )
-                                        
-                                        for encoding in face_encodings:
-                                            names.append(name)
-                                            encodings.append(encoding)
-                                        frames_processed += 1
+                            for rgb_frames in sample_video_frames(
+                                filepath, frames_per_second=2, batch_size=VIDEO_BATCH_SIZE
+                            ):
+                                small_frames, scales = zip(*(
+                                    _downscale_for_detection(rgb_frame, TRAINING_IMAGE_MAX_SIDE)
+                                    for rgb_frame in rgb_frames
+                                ))
+                                batch_locations = [
+                                    _scale_face_locations(face_locations, scale)
+                                    for face_locations, scale in zip(
+                                        detector.detect_batch(list(small_frames)), scales
+                                    )
+                                ]
+                                face_frames = [
+                                    (rgb_frame, face_locations)
+                                    for rgb_frame, face_locations in zip(rgb_frames, batch_locations)
+                                    if face_locations
+                                ]
+                                if not face_frames:
+                                    continue
                                 
-                                frame_count += 1
-                            
-                            cap.release()
+                                # Use the encoding model selected by user (HOG -> small, CNN -> large)
+                                batch_encodings = batch_face_encodings(
+                                    [frame for frame, _ in face_frames],
+                                    [face_locations for _, face_locations in face_frames],
+                                    model=encoding_model
+                                )
+                                for face_encodings in batch_encodings:
+                                    for encoding in face_encodings:
+                                        names.append(name)
+                                        encodings.append(encoding)
+                                frames_processed += len(face_frames)
                             
                             if frames_processed > 0:
                                 processed_count += 1
@@ -2012,6 +2725,7 @@ class FaceRecognitionApp:
                                 if model_name not in self.processed_files:
                                     self.processed_files[model_name] = set()
                                 self.processed_files[model_name].add(file_key)
+                                new_file_keys.append(file_key)
                             else:
                                 error_count += 1
                                 error_files.append(f"{filepath.name} (no faces in video)")
@@ -2021,6 +2735,9 @@ class FaceRecognitionApp:
                         error_files.append(f"{filepath.name}: {str(e)}")
                         print(f"Error processing {filepath}: {e}")
                 
+                decode_pool.shutdown()
+                encode_pending_images()
+                
                 if not names:
                     error_msg = f"No faces found in any training images!\n\n"
                     error_msg += f"Processed: {processed_count} files\n"
@@ -2037,19 +2754,24 @@ class FaceRecognitionApp:
                     ))
                     return
                 
-                name_encodings = {"names": names, "encodings": encodings}
+                # Copy out of the memory-mapped gallery and drop our references
+                # to it before the file is replaced on disk
+                encodings = np.asarray(encodings, dtype=np.float32)
+                existing_encodings = current_encodings = None
+                self.loaded_encodings[model_name] = None
+                self.galleries.pop(model_name, None)
+                
                 # Save to model-specific file
-                encodings_path = ENCODINGS_PATHS[model_name]
-                with encodings_path.open(mode="wb") as f:
-                    pickle.dump(name_encodings, f)
+                encodings = save_encodings(ENCODINGS_PATHS[model_name], names, encodings)
                 
                 # Update loaded encodings
-                self.loaded_encodings[model_name] = name_encodings
+                self.loaded_encodings[model_name] = {"names": names, "encodings": encodings}
+                self._set_person_count(model_name)
                 
                 # Save processed files list
-                self.save_processed_files(model_name)
+                self.save_processed_files(model_name, new_file_keys)
                 
-                num_people = len(set(names))
+                num_people = self._person_count.get(model_name, 0)
                 success_msg = f"Model trained successfully!\n\n"
                 if incremental and new_count > 0:
                     success_msg += f"✓ {new_count} new file(s) processed\n"
@@ -2088,44 +2810,36 @@ class FaceRecognitionApp:
     
     def recognize_face_in_frame(self, face_encoding):
         """Compare face encoding with known encodings using improved distance-based matching."""
-        current_encodings = self.get_current_encodings()
-        if not current_encodings:
-            return None
-        
-        # Use face_distance for more accurate matching
-        face_distances = face_recognition.face_distance(
-            current_encodings["encodings"], face_encoding
-        )
-        
-        # Find the best match (lowest distance)
-        best_match_index = np.argmin(face_distances)
-        best_distance = face_distances[best_match_index]
+        return self.recognize_faces([face_encoding])[0]
+    
+    def recognize_faces(self, face_encodings):
+        """Match several face encodings at once. Returns a name (or None) per encoding."""
+        if len(face_encodings) == 0:
+            return []
+        gallery = self.get_current_gallery()
+        if not gallery:
+            return [None] * len(face_encodings)
         
         # Use a stricter threshold for better accuracy
         # Lower distance = better match (0.0 = identical, 1.0 = very different)
         threshold = 0.40  # Balanced threshold (was 0.35 too strict, 0.45 too loose)
         
-        if best_distance <= threshold:
-            # Get all matches within threshold and use weighted voting
-            matches = face_distances <= threshold
-            if matches.sum() > 0:
-                # Weight votes by inverse distance (closer = more weight)
-                weighted_votes = {}
-                for i in range(len(current_encodings["names"])):
-                    if matches[i]:
-                        name = current_encodings["names"][i]
-                        distance = face_distances[i]
-                        # Weight: closer faces get higher weight
-                        weight = 1.0 / (distance + 0.1)  # Add small value to avoid division by zero
-                        if name not in weighted_votes:
-                            weighted_votes[name] = 0
-                        weighted_votes[name] += weight
-                
-                if weighted_votes:
-                    # Return person with highest weighted vote
-                    return max(weighted_votes.items(), key=lambda x: x[1])[0]
-        
-        return None
+        # Known encodings within the threshold for every face, from one
+        # batched distance computation (exact scan, or ANN for large galleries)
+        names = []
+        for match_indices, match_distances in gallery.candidates_batch(face_encodings, threshold):
+            if len(match_indices) > 0:
+                # Weight votes by inverse distance (closer = more weight);
+                # add a small value to avoid division by zero
+                weighted_votes = np.bincount(
+                    gallery.person_ids[match_indices],
+                    weights=1.0 / (match_distances + 0.1)
+                )
+                # Pick the person with highest weighted vote
+                names.append(gallery.person_names[weighted_votes.argmax()])
+            else:
+                names.append(None)
+        return names
     
     def start_live_recognition(self):
         """Start live camera recognition."""
@@ -2220,10 +2934,15 @@ class FaceRecognitionApp:
         self.live_api_transcript_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.live_api_transcript_text.yview)
         
+        # Message tags are configured once, with the widget
+        self.live_api_transcript_text.tag_config("info", foreground=COLORS["text_secondary"])
+        self.live_api_transcript_text.tag_config("user", foreground=COLORS["accent_purple"], font=("Segoe UI", 9, "bold"))
+        self.live_api_transcript_text.tag_config("response", foreground=COLORS["accent_blue"], font=("Segoe UI", 9, "bold"))
+        
         # Initial message
         self.live_api_transcript_text.insert(tk.END, "💡 Start a Live Call to begin conversation...\n", "info")
-        self.live_api_transcript_text.tag_config("info", foreground=COLORS["text_secondary"])
         self.live_api_transcript_text.config(state=tk.DISABLED)
+        self._transcript_has_placeholder = True
         
         # Control frame (bottom section - placed below main_container, not inside it)
         control_frame = tk.Frame(camera_window, bg=COLORS["bg_secondary"])
@@ -2334,7 +3053,7 @@ class FaceRecognitionApp:
         stop_btn.pack(side=tk.LEFT, padx=5)
         
         self.camera_running = True
-        self.video_capture = cv2.VideoCapture(self.camera_index.get())
+        self.video_capture = self._open_camera(self.camera_index.get())
         
         if not self.video_capture.isOpened():
             messagebox.showerror("Error", f"Could not open camera {self.camera_index.get()}")
@@ -2346,255 +3065,401 @@ class FaceRecognitionApp:
         face_locations_cache = []
         face_names_cache = []
         analysis_cache = {}  # Store analysis for each recognized face
+        track_cache = FaceTrackCache()  # Names of faces that have not moved
+        tracked_model = None  # Detection model the tracked names came from
+        detection_thumbnail = None  # Motion thumbnail of the last detected frame
+        detection_frame_number = 0
+        # Frames between detections and between DeepFace analyses follow the
+        # measured per-frame latency of each (milliseconds, averaged)
+        detect_ms = None
+        analyze_ms = None
+        analyze_step = 9
+        analysis_frame_number = -analyze_step
         
         # Audio recording variables
         audio_buffer = []
         last_audio_process_time = 0
         audio_process_interval = 3.0  # Process audio every 3 seconds
         
-        def update_frame():
-            nonlocal process_frame_count, face_locations_cache, face_names_cache, analysis_cache
+        # Pipeline: capture thread -> read_q -> processing thread -> display_q -> Tk
+        self.read_q = queue.Queue(maxsize=4)
+        # Tk only ever shows the newest processed frame, so one slot is enough
+        self.display_q = queue.Queue(maxsize=1)
+        read_q = self.read_q
+        display_q = self.display_q
+        
+        # Kept current by Tk variable traces, safe to read from the worker
+        camera_settings = self.camera_settings
+        
+        def transform_frame(frame):
+            # Apply camera transformations (flip/rotate)
+            return camera_settings["orient"](frame)
+        
+        def identify_faces(frames, frame_numbers, detections):
+            """Name the detected faces of a frame batch with one encoder call and one gallery query."""
+            nonlocal tracked_model
             
-            if not self.camera_running:
-                return
+            # Identities from another model's gallery are not reusable
+            if camera_settings["detection_model"] != tracked_model:
+                track_cache.clear()
+                tracked_model = camera_settings["detection_model"]
             
-            ret, frame = self.video_capture.read()
-            if ret:
-                # Apply camera transformations (flip/rotate)
-                if self.camera_flip_horizontal.get():
-                    frame = cv2.flip(frame, 1)  # Horizontal flip
-                if self.camera_flip_vertical.get():
-                    frame = cv2.flip(frame, 0)  # Vertical flip
+            # Reuse names of faces that barely moved; only encode the rest
+            names = {}
+            pending = []  # (frame index, indices of faces to encode)
+            for idx, face_locations in detections.items():
+                names[idx] = [
+                    track_cache.lookup(location, frame_numbers[idx]) for location in face_locations
+                ]
+                to_encode = [i for i, name in enumerate(names[idx]) if name is None]
+                if to_encode:
+                    pending.append((idx, to_encode))
+            
+            if pending:
+                # Get encodings with selected model (HOG -> small, CNN -> large),
+                # cropping faces from the full-resolution frames of the whole batch
+                encodings_per_frame = batch_face_encodings(
+                    [cv2.cvtColor(frames[idx], cv2.COLOR_BGR2RGB) for idx, _ in pending],
+                    [[detections[idx][i] for i in to_encode] for idx, to_encode in pending],
+                    model=camera_settings["encoding_model"]
+                )
+                recognized = iter(self.recognize_faces(
+                    [encoding for encodings in encodings_per_frame for encoding in encodings]
+                ))
+                for (idx, to_encode), encodings in zip(pending, encodings_per_frame):
+                    for i, _ in zip(to_encode, encodings):
+                        name = next(recognized) or "Unknown"
+                        names[idx][i] = name
+                        track_cache.update(detections[idx][i], name, frame_numbers[idx])
+            
+            return {
+                idx: [name or "Unknown" for name in frame_names]
+                for idx, frame_names in names.items()
+            }
+        
+        # DeepFace overlay title, placed at the panel's top-left corner
+        overlay_title = _text_stamp((320, 40), [
+            ("DeepFace Analysis", (10, 28), cv2.FONT_HERSHEY_DUPLEX, 0.7, (0, 255, 255), 2),
+            ("DeepFace Analysis", (10, 28), cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), 1),
+        ])
+        
+        def process_frame(frame, frame_number, face_locations=None, face_names=None):
+            nonlocal face_locations_cache, face_names_cache, analysis_cache
+            nonlocal analyze_ms, analyze_step, analysis_frame_number
+            
+            # Detection results are only passed in for every Nth frame
+            if face_locations is not None:
+                face_locations_cache = face_locations
+                face_names_cache = face_names or ["Unknown"] * len(face_locations)
                 
-                # Apply rotation
-                rotation = self.camera_rotate.get()
-                if rotation == 90:
-                    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-                elif rotation == 180:
-                    frame = cv2.rotate(frame, cv2.ROTATE_180)
-                elif rotation == 270:
-                    frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+                # Get analysis
+                # Don't reset analysis_cache - keep previous analysis until updated
                 
-                # Only process every 3rd frame for better performance
-                process_frame_count += 1
-                should_process = (process_frame_count % 3 == 0)
+                # Get DeepFace analyzer if using DeepFace model, only on the
+                # frames that are analyzed (less frequently for performance)
+                deepface_analyzer = None
+                if (camera_settings["detection_model"] == "deepface"
+                        and frame_number - analysis_frame_number >= analyze_step):
+                    try:
+                        deepface_analyzer = self.get_detector("deepface")
+                    except:
+                        pass
                 
-                if should_process:
-                    # Resize for faster processing
-                    small_frame = cv2.resize(frame, (0, 0), fx=0.4, fy=0.4)
-                    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Detect faces
-                    detector = self.get_detector()
-                    face_locations_cache = detector.detect_faces(rgb_small_frame)
+                if deepface_analyzer:
+                    analysis_frame_number = frame_number
+                    analysis_start = time.perf_counter()
                     
-                    # Get encodings with selected model (HOG -> small, CNN -> large)
-                    encoding_model = "small" if self.model_type.get() == "hog" else "large"
-                    face_encodings = face_recognition.face_encodings(
-                        rgb_small_frame, face_locations_cache, model=encoding_model
-                    )
-                    
-                    # Recognize faces and get analysis
-                    face_names_cache = []
-                    # Don't reset analysis_cache - keep previous analysis until updated
+                    # Collect the face crops of this frame so DeepFace analyzes
+                    # them all in one batched call
+                    face_rois = []
+                    roi_faces = []  # (face index, name) for each crop
+                    for i, name in enumerate(face_names_cache):
+                        if i < len(face_locations_cache):
+                            top, right, bottom, left = face_locations_cache[i]
+                            
+                            # Extract face region (ensure valid bounds)
+                            top = max(0, top)
+                            left = max(0, left)
+                            bottom = min(frame.shape[0], bottom)
+                            right = min(frame.shape[1], right)
+                            
+                            if bottom > top and right > left:
+                                face_roi = frame[top:bottom, left:right]
+                                if face_roi.size > 0 and face_roi.shape[0] > 20 and face_roi.shape[1] > 20:
+                                    face_rois.append(face_roi)
+                                    roi_faces.append((i, name))
                     
-                    # Get DeepFace analyzer if using DeepFace model
-                    deepface_analyzer = None
-                    if self.detection_model.get() == "deepface":
-                        try:
-                            deepface_analyzer = self.get_detector()
-                        except:
-                            pass
+                    try:
+                        # The BGR crops are passed in memory, no temp JPEGs; they
+                        # are already faces, so DeepFace skips detection
+                        analyses = deepface_analyzer.analyze_face_batch(
+                            face_rois,
+                            actions=['emotion', 'age', 'gender', 'race'],
+                            detector_backend='skip'
+                        ) if face_rois else []
+                    except Exception as e:
+                        # Print error for debugging
+                        print(f"DeepFace analysis error: {e}")
+                        analyses = []
+                    analyze_ms = _ewma(analyze_ms, (time.perf_counter() - analysis_start) * 1000)
+                    analyze_step = _frame_step(analyze_ms)
                     
-                    for i, face_encoding in enumerate(face_encodings):
-                        name = self.recognize_face_in_frame(face_encoding)
-                        name = name if name else "Unknown"
-                        face_names_cache.append(name)
-                        
-                        # Get DeepFace analysis for all faces (less frequently for performance)
-                        if deepface_analyzer and (process_frame_count % 9 == 0):
+                    for (i, name), analysis in zip(roi_faces, analyses):
+                        # Store analysis even if partial (some actions may have failed)
+                        # Apply calibration if available
+                        # This combines: 1) DeepFace pre-trained model predictions + 2) Your personal training data
+                        if self.deepface_calibrator and name != "Unknown" and analysis:
                             try:
-                                # Scale back to full frame size for analysis
-                                scale_factor = 1 / 0.4
-                                if i < len(face_locations_cache):
-                                    top, right, bottom, left = face_locations_cache[i]
-                                    top = int(top * scale_factor)
-                                    right = int(right * scale_factor)
-                                    bottom = int(bottom * scale_factor)
-                                    left = int(left * scale_factor)
-                                    
-                                    # Extract face region (ensure valid bounds)
-                                    top = max(0, top)
-                                    left = max(0, left)
-                                    bottom = min(frame.shape[0], bottom)
-                                    right = min(frame.shape[1], right)
-                                    
-                                    if bottom > top and right > left:
-                                        face_roi = frame[top:bottom, left:right]
-                                        if face_roi.size > 0 and face_roi.shape[0] > 20 and face_roi.shape[1] > 20:
-                                            import tempfile
-                                            import os
-                                            temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-                                            os.close(temp_fd)
-                                            cv2.imwrite(temp_path, face_roi)
-                                            
-                                            analysis = deepface_analyzer.analyze_face(
-                                                temp_path,
-                                                actions=['emotion', 'age', 'gender', 'race']
-                                            )
-                                            
-                                            # Store analysis even if partial (some actions may have failed)
-                                            # Apply calibration if available
-                                            # This combines: 1) DeepFace pre-trained model predictions + 2) Your personal training data
-                                            if self.deepface_calibrator and name != "Unknown" and analysis:
-                                                try:
-                                                    # Apply personal calibration on top of DeepFace model predictions
-                                                    analysis = self.deepface_calibrator.calibrate_result(name, analysis)
-                                                except Exception as e:
-                                                    print(f"Calibration error: {e}")
-                                            elif analysis:
-                                                # Even without calibration, we still use DeepFace pre-trained model predictions
-                                                pass
-                                            
-                                            # Use face index as key if name is Unknown, otherwise use name
-                                            cache_key = name if name != "Unknown" else f"Face_{i}"
-                                            analysis_cache[cache_key] = {
-                                                'emotion': analysis.get('dominant_emotion', 'N/A') if analysis else 'N/A',
-                                                'age': int(analysis.get('age', 0)) if analysis and analysis.get('age') else 0,
-                                                'gender': analysis.get('dominant_gender', 'N/A') if analysis else 'N/A',
-                                                'race': analysis.get('dominant_race', 'N/A') if analysis else 'N/A'
-                                            }
-                                            
-                                            os.remove(temp_path)
+                                # Apply personal calibration on top of DeepFace model predictions
+                                analysis = self.deepface_calibrator.calibrate_result(name, analysis)
                             except Exception as e:
-                                # Print error for debugging
-                                print(f"DeepFace analysis error: {e}")
-                                pass
+                                print(f"Calibration error: {e}")
+                        
+                        # Use face index as key if name is Unknown, otherwise use name
+                        cache_key = name if name != "Unknown" else f"Face_{i}"
+                        analysis_cache[cache_key] = {
+                            'emotion': analysis.get('dominant_emotion', 'N/A') if analysis else 'N/A',
+                            'age': int(analysis.get('age', 0)) if analysis and analysis.get('age') else 0,
+                            'gender': analysis.get('dominant_gender', 'N/A') if analysis else 'N/A',
+                            'race': analysis.get('dominant_race', 'N/A') if analysis else 'N/A'
+                        }
+            
+            # Draw on full-size frame using cached results (already in frame coordinates)
+            for (top, right, bottom, left), name in zip(face_locations_cache, face_names_cache):
+                color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
+                cv2.rectangle(frame, (left, top), (right, bottom), color, 3)
                 
-                # Draw on full-size frame using cached results
-                scale_factor = 1 / 0.4  # Inverse of resize factor
+                # Draw name label (simpler, analysis shown in overlay)
+                display_text = name
+                text_size = cv2.getTextSize(display_text, cv2.FONT_HERSHEY_DUPLEX, 0.7, 2)[0]
+                text_height = text_size[1] + 10
                 
-                # Draw face bounding boxes and names
-                for (top, right, bottom, left), name in zip(face_locations_cache, face_names_cache):
-                    # Scale back to full frame size
-                    top = int(top * scale_factor)
-                    right = int(right * scale_factor)
-                    bottom = int(bottom * scale_factor)
-                    left = int(left * scale_factor)
-                    
-                    color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
-                    cv2.rectangle(frame, (left, top), (right, bottom), color, 3)
-                    
-                    # Draw name label (simpler, analysis shown in overlay)
-                    display_text = name
-                    text_size = cv2.getTextSize(display_text, cv2.FONT_HERSHEY_DUPLEX, 0.7, 2)[0]
-                    text_height = text_size[1] + 10
-                    
-                    # Draw background for name
-                    cv2.rectangle(
-                        frame, (left, bottom - text_height), (right, bottom), color, cv2.FILLED
-                    )
-                    
-                    # Draw name
-                    font = cv2.FONT_HERSHEY_DUPLEX
-                    cv2.putText(
-                        frame, display_text, (left + 6, bottom - 10),
-                        font, 0.7, (255, 255, 255), 2
-                    )
+                # Draw background for name
+                cv2.rectangle(
+                    frame, (left, bottom - text_height), (right, bottom), color, cv2.FILLED
+                )
                 
-                # Draw analysis overlay in top-left corner (if using DeepFace)
-                # Show overlay even if analysis_cache is empty (will show "N/A" for missing data)
-                if self.detection_model.get() == "deepface":
-                    # If we have faces but no analysis yet, create placeholder entries
-                    if not analysis_cache and face_names_cache:
-                        for idx, name in enumerate(face_names_cache):
-                            cache_key = name if name != "Unknown" else f"Face_{idx}"
-                            analysis_cache[cache_key] = {
-                                'emotion': 'Processing...',
-                                'age': 0,
-                                'gender': 'Processing...',
-                                'race': 'Processing...'
-                            }
-                    
-                    # Calculate overlay size based on number of people
-                    num_people = len(analysis_cache) if analysis_cache else (len(face_names_cache) if face_names_cache else 1)
-                    overlay_y = 10
-                    overlay_x = 10
-                    overlay_width = 320
-                    overlay_height = min(300, 50 + num_people * 90)  # Dynamic height, increased for more info
-                    
-                    # Semi-transparent background
-                    overlay = frame.copy()
-                    cv2.rectangle(overlay, (overlay_x, overlay_y), 
-                                 (overlay_x + overlay_width, overlay_y + overlay_height), 
-                                 (0, 0, 0), -1)
-                    cv2.addWeighted(overlay, 0.75, frame, 0.25, 0, frame)
-                    
-                    # Draw title with border
+                # Draw name
+                font = cv2.FONT_HERSHEY_DUPLEX
+                cv2.putText(
+                    frame, display_text, (left + 6, bottom - 10),
+                    font, 0.7, (255, 255, 255), 2
+                )
+            
+            # Draw analysis overlay in top-left corner (if using DeepFace)
+            # Show overlay even if analysis_cache is empty (will show "N/A" for missing data)
+            if camera_settings["detection_model"] == "deepface":
+                # If we have faces but no analysis yet, create placeholder entries
+                if not analysis_cache and face_names_cache:
+                    for idx, name in enumerate(face_names_cache):
+                        cache_key = name if name != "Unknown" else f"Face_{idx}"
+                        analysis_cache[cache_key] = {
+                            'emotion': 'Processing...',
+                            'age': 0,
+                            'gender': 'Processing...',
+                            'race': 'Processing...'
+                        }
+                
+                # Calculate overlay size based on number of people
+                num_people = len(analysis_cache) if analysis_cache else (len(face_names_cache) if face_names_cache else 1)
+                overlay_y = 10
+                overlay_x = 10
+                overlay_width = 320
+                overlay_height = min(300, 50 + num_people * 90)  # Dynamic height, increased for more info
+                
+                # Semi-transparent background: blending black at 75% is just
+                # scaling the panel region, so only those pixels are touched
+                # instead of copying and blending the whole frame
+                panel = frame[overlay_y:overlay_y + overlay_height + 1,
+                              overlay_x:overlay_x + overlay_width + 1]
+                panel[...] = cv2.convertScaleAbs(panel, alpha=0.25)
+                
+                # Draw title with border (pre-rendered once, pasted per frame)
+                if not _paste_stamp(frame, overlay_title, overlay_x, overlay_y):
                     title = "DeepFace Analysis"
                     cv2.putText(frame, title, (overlay_x + 10, overlay_y + 28),
                               cv2.FONT_HERSHEY_DUPLEX, 0.7, (0, 255, 255), 2)
                     cv2.putText(frame, title, (overlay_x + 10, overlay_y + 28),
                               cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), 1)
+                
+                # Draw analysis for each person (both recognized and unknown)
+                y_offset = overlay_y + 55
+                line_height = 22
+                for person_key, analysis_data in analysis_cache.items():
+                    if y_offset + line_height * 5 > overlay_y + overlay_height - 10:
+                        break  # Don't overflow overlay
                     
-                    # Draw analysis for each person (both recognized and unknown)
-                    y_offset = overlay_y + 55
-                    line_height = 22
-                    for person_key, analysis_data in analysis_cache.items():
-                        if y_offset + line_height * 5 > overlay_y + overlay_height - 10:
-                            break  # Don't overflow overlay
-                        
-                        # Person name (highlighted)
-                        display_name = person_key if person_key.startswith("Face_") else person_key
-                        cv2.putText(frame, f"Person: {display_name}", 
-                                  (overlay_x + 10, y_offset),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-                        y_offset += line_height
-                        
-                        # Emotion
-                        emotion = analysis_data.get('emotion', 'N/A')
-                        cv2.putText(frame, f"  Emotion: {emotion}", 
-                                  (overlay_x + 10, y_offset),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        y_offset += line_height
-                        
-                        # Age and Gender
-                        age = analysis_data.get('age', 0)
-                        gender = analysis_data.get('gender', 'N/A')
-                        cv2.putText(frame, f"  Age: {age}y | Gender: {gender}", 
+                    # Person name (highlighted)
+                    display_name = person_key if person_key.startswith("Face_") else person_key
+                    cv2.putText(frame, f"Person: {display_name}", 
+                              (overlay_x + 10, y_offset),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                    y_offset += line_height
+                    
+                    # Emotion
+                    emotion = analysis_data.get('emotion', 'N/A')
+                    cv2.putText(frame, f"  Emotion: {emotion}", 
+                              (overlay_x + 10, y_offset),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    y_offset += line_height
+                    
+                    # Age and Gender
+                    age = analysis_data.get('age', 0)
+                    gender = analysis_data.get('gender', 'N/A')
+                    cv2.putText(frame, f"  Age: {age}y | Gender: {gender}", 
+                              (overlay_x + 10, y_offset),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    y_offset += line_height
+                    
+                    # Race (if available)
+                    race = analysis_data.get('race', 'N/A')
+                    if race != 'N/A':
+                        cv2.putText(frame, f"  Race: {race}", 
                                   (overlay_x + 10, y_offset),
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
                         y_offset += line_height
+                    
+                    y_offset += 5  # Spacing between people
+                    
+                    # Race
+                    race = analysis_data.get('race', 'N/A')
+                    cv2.putText(frame, f"  Race: {race}", 
+                              (overlay_x + 10, y_offset),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    y_offset += line_height + 8  # Extra space between people
+            
+            return frame
+        
+        def process_frames():
+            nonlocal process_frame_count, detection_thumbnail, detection_frame_number, detect_ms
+            
+            while self.camera_running:
+                # Micro-batch frames until the batch is full or the deadline passes
+                try:
+                    batch = [read_q.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                deadline = time.perf_counter() + DETECTION_BATCH_DEADLINE
+                while len(batch) < DETECTION_BATCH_SIZE:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(read_q.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                
+                frames = [transform_frame(frame) for frame in batch]
+                frame_numbers = list(range(process_frame_count + 1, process_frame_count + 1 + len(frames)))
+                process_frame_count += len(frames)
+                
+                # Only process every Nth frame for better performance
+                small_frames = {}
+                scales = {}
+                detections = {}
+                for idx, frame_number in enumerate(frame_numbers):
+                    if frame_number % self.detector_step == 0:
+                        # While the scene is still, keep the cached boxes and
+                        # names instead of running the detector again
+                        thumbnail = _motion_thumbnail(frames[idx])
+                        if (detection_thumbnail is not None
+                                and camera_settings["detection_model"] == tracked_model
+                                and frame_number - detection_frame_number < MOTION_MAX_SKIP_FRAMES
+                                and _motion_score(thumbnail, detection_thumbnail) < MOTION_THRESHOLD):
+                            continue
+                        detection_thumbnail = thumbnail
+                        detection_frame_number = frame_number
                         
-                        # Race (if available)
-                        race = analysis_data.get('race', 'N/A')
-                        if race != 'N/A':
-                            cv2.putText(frame, f"  Race: {race}", 
-                                      (overlay_x + 10, y_offset),
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                            y_offset += line_height
-                        
-                        y_offset += 5  # Spacing between people
-                        
-                        # Race
-                        race = analysis_data.get('race', 'N/A')
-                        cv2.putText(frame, f"  Race: {race}", 
-                                  (overlay_x + 10, y_offset),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                        y_offset += line_height + 8  # Extra space between people
+                        # Detect on a downscaled copy for faster processing
+                        small_frames[idx], scales[idx] = _downscale_for_detection(frames[idx])
                 
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(frame_rgb)
-                img = img.resize((880, 660), Image.Resampling.LANCZOS)
-                imgtk = ImageTk.PhotoImage(image=img)
+                detection_start = time.perf_counter()
+                if small_frames:
+                    try:
+                        # Detect faces for all due frames in one detector call;
+                        # frames stay BGR and each detector converts only if it must
+                        detector = self.get_detector()
+                        results = detector.detect_batch_cv2(list(small_frames.values()))
+                        for idx, face_locations in zip(small_frames.keys(), results):
+                            detections[idx] = _scale_face_locations(face_locations, scales[idx])
+                    except Exception as e:
+                        print(f"Live recognition error: {e}")
                 
-                video_label.imgtk = imgtk
-                video_label.config(image=imgtk)
+                names = {}
+                if detections:
+                    try:
+                        names = identify_faces(frames, frame_numbers, detections)
+                    except Exception as e:
+                        print(f"Live recognition error: {e}")
+                
+                # Detect on every Nth frame, with N sized so that detection
+                # and recognition fit the frame budget on this machine
+                if small_frames:
+                    elapsed_ms = (time.perf_counter() - detection_start) * 1000
+                    detect_ms = _ewma(detect_ms, elapsed_ms / len(small_frames))
+                    self.detector_step = _frame_step(detect_ms)
+                
+                for idx, frame in enumerate(frames):
+                    try:
+                        frame = process_frame(
+                            frame, frame_numbers[idx], detections.get(idx), names.get(idx)
+                        )
+                    except Exception as e:
+                        print(f"Live recognition error: {e}")
+                    _put_drop_oldest(display_q, frame)
+        
+        preview = FramePreview((880, 660))
+        
+        def drain_display():
+            if not self.camera_running:
+                return
             
-            if self.camera_running:
-                camera_window.after(33, update_frame)  # ~30 FPS for better performance
+            # Show only the newest processed frame
+            frame = None
+            while True:
+                try:
+                    frame = display_q.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if frame is not None:
+                imgtk = preview.render(frame)
+                if video_label.cget("image") != str(imgtk):
+                    video_label.imgtk = imgtk
+                    video_label.config(image=imgtk)
+            
+            camera_window.after(15, drain_display)
         
-        update_frame()
+        camera_window.protocol("WM_DELETE_WINDOW", lambda: self.stop_camera(camera_window))
+        
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, args=(self.video_capture, read_q), daemon=True
+        )
+        self._capture_thread.start()
+        threading.Thread(target=process_frames, daemon=True).start()
+        drain_display()
+    
+    def _capture_loop(self, capture, frame_queue):
+        """Read camera frames into a bounded queue until the camera is stopped."""
+        # A frame dropped from the queue was never seen downstream, so its
+        # buffer can be decoded into again instead of allocating a new one
+        spare = None
+        while self.camera_running:
+            if not capture.grab():
+                time.sleep(0.01)
+                continue
+            ret, frame = capture.retrieve(spare)
+            if ret:
+                spare = _put_drop_oldest(frame_queue, frame)
+    
+    def _open_camera(self, camera_index):
+        """Open a camera with low-latency capture settings."""
+        capture = cv2.VideoCapture(camera_index)
+        # Keep only the newest frame queued so the preview never drifts behind
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # Ask USB webcams for MJPG, which they can deliver without re-encoding
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        return capture
     
     def rotate_camera(self):
         """Rotate camera by 90 degrees (cycles: 0 -> 90 -> 180 -> 270 -> 0)."""
@@ -2606,6 +3471,11 @@ class FaceRecognitionApp:
     def stop_camera(self, window):
         """Stop the camera and close the window."""
         self.camera_running = False
+        # Let the capture thread finish its current grab before releasing
+        capture_thread = getattr(self, "_capture_thread", None)
+        if capture_thread is not None:
+            capture_thread.join(timeout=1.0)
+            self._capture_thread = None
         if self.video_capture:
             self.video_capture.release()
         
@@ -2862,7 +3732,7 @@ class FaceRecognitionApp:
         stop_btn.pack(side=tk.LEFT, padx=5)
         
         self.camera_running = True
-        self.video_capture = cv2.VideoCapture(self.camera_index.get())
+        self.video_capture = self._open_camera(self.camera_index.get())
         
         if not self.video_capture.isOpened():
             messagebox.showerror("Error", f"Could not open camera {self.camera_index.get()}")
@@ -2875,11 +3745,15 @@ class FaceRecognitionApp:
         face_names_cache = []
         
         # Detection history for accuracy - require multiple consistent detections
-        # Format: {(face_location_tuple): {"name": "Name", "count": 5, "display_name": "Name", "display_count": 3, "last_seen": frame_count}}
+        # Format: {(face_location_tuple): {"name": "Name", "count": 5, "display_name": "Name", "display_count": 3, "last_seen": result_count}}
         detection_history = {}  # Track detections per face location
         REQUIRED_CONSISTENT_DETECTIONS = 8  # Require 8 consistent detections before marking (balanced for accuracy)
         REQUIRED_DISPLAY_DETECTIONS = 3  # Require 3 consistent detections before showing name on screen (prevents flickering)
-        DETECTION_TIMEOUT = 15  # Reset detection if face not seen for 15 frames
+        DETECTION_TIMEOUT = 5  # Reset detection if face missing from 5 inference results (15 frames)
+        # These counts were tuned for inference on every 3rd frame; the adaptive
+        # hand-off step never drops below that, so 8 detections span >= 24 frames
+        MIN_INFER_STEP = 3
+        result_count = 0  # Inference results received, the clock for detection history
         
         # Check date periodically and reset if new day
         def check_date_reset():
@@ -2897,79 +3771,130 @@ class FaceRecognitionApp:
         # Start date checking
         check_date_reset()
         
+        # Detection, encoding and matching run on a worker thread fed through
+        # a single-slot queue, so slow inference never stalls the Tk loop
+        infer_in = queue.Queue(maxsize=1)
+        infer_result = {}
+        infer_lock = threading.Lock()
+        # Frames between hand-offs follow the worker's measured latency
+        infer_ms = None
+        infer_step = MIN_INFER_STEP
+        
+        def infer_frames():
+            nonlocal infer_ms, infer_step
+            
+            while self.camera_running:
+                try:
+                    frame = infer_in.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                infer_start = time.perf_counter()
+                
+                # Detect on a frame capped at DETECTION_MAX_SIDE for speed
+                small_frame, detection_scale = _downscale_for_detection(frame)
+                
+                face_locations = []
+                try:
+                    # Detect faces using YOLOv11 detector (returns face locations directly)
+                    detector = self.get_detector()
+                    if detector:
+                        face_locations = _scale_face_locations(
+                            detector.detect_faces_cv2(small_frame), detection_scale
+                        )
+                except Exception as e:
+                    print(f"Face detection error: {e}")
+                
+                names = None
+                if face_locations and self.get_current_encodings():
+                    try:
+                        # Get face encodings from the full-resolution frame
+                        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                        face_recognition = _lazy_import("face_recognition")
+                        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+                        # Recognize each face with the stricter threshold
+                        names = [
+                            name or "Unknown" for name in self.recognize_faces(face_encodings)
+                        ]
+                    except Exception as e:
+                        print(f"Face recognition error: {e}")
+                
+                infer_ms = _ewma(infer_ms, (time.perf_counter() - infer_start) * 1000)
+                infer_step = max(MIN_INFER_STEP, _frame_step(infer_ms))
+                
+                with infer_lock:
+                    infer_result["latest"] = (frame, face_locations, names)
+        
+        threading.Thread(target=infer_frames, daemon=True).start()
+        
+        # Google Sheet writes run on worker threads, one at a time, so a slow
+        # or failing network call never stalls the camera loop
+        sheet_lock = threading.Lock()
+        
+        def mark_in_sheet(name):
+            with sheet_lock:
+                try:
+                    from attendance_sheet import mark_present
+                    mark_present(name)
+                except Exception as e:
+                    import traceback
+                    error_msg = f"Error marking attendance for {name}:\n{str(e)}\n\n{traceback.format_exc()}"
+                    print(error_msg)
+                    self.root.after(0, lambda err=str(e): messagebox.showerror(
+                        "Attendance Error", f"Failed to update Google Sheet for {name}:\n{err}"
+                    ))
+        
+        preview = FramePreview((880, 660))
+        camera_settings = self.camera_settings
+        
         def update_frame():
-            nonlocal process_frame_count, face_locations_cache, face_names_cache, detection_history
+            nonlocal process_frame_count, result_count, face_locations_cache, face_names_cache, detection_history
             
             if not self.camera_running:
                 return
             
-            ret, frame = self.video_capture.read()
-            if not ret:
-                if self.camera_running:
-                    camera_window.after(33, update_frame)
+            # Take the newest frame from the capture thread without blocking Tk
+            try:
+                frame = capture_q.get_nowait()
+            except queue.Empty:
+                camera_window.after(15, update_frame)
                 return
             
             # Apply camera transformations
-            if self.camera_flip_horizontal.get():
-                frame = cv2.flip(frame, 1)
-            if self.camera_flip_vertical.get():
-                frame = cv2.flip(frame, 0)
-            rotation = self.camera_rotate.get()
-            if rotation == 90:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-            elif rotation == 180:
-                frame = cv2.rotate(frame, cv2.ROTATE_180)
-            elif rotation == 270:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+            frame = camera_settings["orient"](frame)
             
-            # Process frames (same logic as Live Recognition)
+            # Hand every Nth frame to the inference worker, N following its
+            # measured latency; if it is still busy, the newer frame replaces
+            # the one waiting in the slot
             process_frame_count += 1
-            should_process = (process_frame_count % 3 == 0)  # Process every 3rd frame
-                
-            if should_process:
-                # Resize frame for faster processing
-                small_frame = cv2.resize(frame, (0, 0), fx=0.4, fy=0.4)
-                rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                
-                # Get YOLOv11 detector (already set at start of function)
-                detector = self.get_detector()
-                
-                face_locations_cache = []
+            if process_frame_count % infer_step == 0:
+                _put_drop_oldest(infer_in, frame.copy())
+            
+            # Pick up the worker's newest result, if there is one
+            with infer_lock:
+                result = infer_result.pop("latest", None)
+            
+            if result is not None:
+                result_frame, face_locations_cache, recognized_names = result
                 face_names_cache = []
-                
-                if detector:
-                    try:
-                        # Detect faces using YOLOv11 detector (returns face locations directly)
-                        face_locations_cache = detector.detect_faces(rgb_small_frame)
-                    except Exception as e:
-                        print(f"Face detection error: {e}")
-                        face_locations_cache = []
+                result_count += 1
                 
                 # Recognize faces with improved accuracy using detection history
-                current_encodings = self.get_current_encodings()
-                if current_encodings and face_locations_cache:
-                    # Get face encodings
-                    face_encodings = face_recognition.face_encodings(
-                        rgb_small_frame, face_locations_cache
-                    )
-                    
-                    # Clean up old detection history (faces not seen recently)
-                    current_frame = process_frame_count
+                if recognized_names:
+                    # Clean up old detection history (faces not seen recently); counted in
+                    # results rather than frames so a slow worker's larger step cannot
+                    # expire every face between two results
+                    current_result = result_count
                     keys_to_remove = []
                     for face_key, history in detection_history.items():
-                        if current_frame - history["last_seen"] > DETECTION_TIMEOUT:
+                        if current_result - history["last_seen"] > DETECTION_TIMEOUT:
                             keys_to_remove.append(face_key)
                     for key in keys_to_remove:
                         del detection_history[key]
                     
                     # Process each detected face
-                    for idx, (face_location, face_encoding) in enumerate(zip(face_locations_cache, face_encodings)):
+                    for idx, (face_location, name) in enumerate(zip(face_locations_cache, recognized_names)):
                         # Use face location as key (rounded to handle small movements)
-                        face_key = tuple(int(coord / 10) * 10 for coord in face_location)
-                        
-                        # Recognize the face with stricter threshold
-                        name = self.recognize_face_in_frame(face_encoding)
-                        name = name if name else "Unknown"
+                        face_key = tuple(int(coord / 25) * 25 for coord in face_location)
                         
                         # Update detection history
                         if name != "Unknown":
@@ -2978,7 +3903,7 @@ class FaceRecognitionApp:
                                 if detection_history[face_key]["name"] == name:
                                     # Increment count
                                     detection_history[face_key]["count"] += 1
-                                    detection_history[face_key]["last_seen"] = current_frame
+                                    detection_history[face_key]["last_seen"] = current_result
                                     
                                     # Update display name only after consistent detections (prevents flickering)
                                     if detection_history[face_key]["count"] >= REQUIRED_DISPLAY_DETECTIONS:
@@ -2995,7 +3920,7 @@ class FaceRecognitionApp:
                                         "count": 1,
                                         "display_name": "Unknown",  # Don't show name until stable
                                         "display_count": 0,
-                                        "last_seen": current_frame
+                                        "last_seen": current_result
                                     }
                             else:
                                 # New face detected - start with "Unknown" display
@@ -3004,7 +3929,7 @@ class FaceRecognitionApp:
                                     "count": 1,
                                     "display_name": "Unknown",  # Don't show name until stable
                                     "display_count": 0,
-                                    "last_seen": current_frame
+                                    "last_seen": current_result
                                 }
                             
                             # Get the display name (stabilized)
@@ -3033,14 +3958,10 @@ class FaceRecognitionApp:
                                     attendance_photos_dir.mkdir(parents=True, exist_ok=True)
                                     
                                     # Create a copy of the frame to draw on
-                                    frame_to_save = frame.copy()
+                                    frame_to_save = result_frame.copy()
                                     
-                                    # Scale face location back to full frame size (detection was done on small_frame)
-                                    scale_factor = 1 / 0.4
-                                    top = int(face_location[0] * scale_factor)
-                                    right = int(face_location[1] * scale_factor)
-                                    bottom = int(face_location[2] * scale_factor)
-                                    left = int(face_location[3] * scale_factor)
+                                    # Face locations are already in full frame coordinates
+                                    top, right, bottom, left = face_location
                                     
                                     # Draw bounding box (green for recognized person)
                                     color = (0, 255, 0)  # Green
@@ -3115,15 +4036,8 @@ class FaceRecognitionApp:
                                     print(traceback.format_exc())
                                 
                                 # Mark in Google Sheet (non-blocking)
-                                try:
-                                    from attendance_sheet import mark_present
-                                    print(f"Marking '{name}' as present (confirmed after {detection_history[face_key]['count']} detections)")
-                                    mark_present(name)
-                                except Exception as e:
-                                    import traceback
-                                    error_msg = f"Error marking attendance for {name}:\n{str(e)}\n\n{traceback.format_exc()}"
-                                    print(error_msg)
-                                    messagebox.showerror("Attendance Error", f"Failed to update Google Sheet for {name}:\n{str(e)}")
+                                print(f"Marking '{name}' as present (confirmed after {detection_history[face_key]['count']} detections)")
+                                threading.Thread(target=mark_in_sheet, args=(name,), daemon=True).start()
                         else:
                             # Unknown face - reset display but keep history for a bit (in case it's temporary)
                             if face_key in detection_history:
@@ -3137,14 +4051,7 @@ class FaceRecognitionApp:
                             face_names_cache.append("Unknown")
             
             # Always draw on full-size frame (even if not processing this frame)
-            scale_factor = 1 / 0.4
-            
             for (top, right, bottom, left), name in zip(face_locations_cache, face_names_cache):
-                top = int(top * scale_factor)
-                right = int(right * scale_factor)
-                bottom = int(bottom * scale_factor)
-                left = int(left * scale_factor)
-                
                 # Green for recognized, red for unknown
                 color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
                 cv2.rectangle(frame, (left, top), (right, bottom), color, 3)
@@ -3168,17 +4075,21 @@ class FaceRecognitionApp:
                 )
             
             # Always display frame (even if not processing faces this frame)
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            img = img.resize((880, 660), Image.Resampling.LANCZOS)
-            imgtk = ImageTk.PhotoImage(image=img)
-            
-            video_label.imgtk = imgtk
-            video_label.config(image=imgtk)
+            imgtk = preview.render(frame)
+            if video_label.cget("image") != str(imgtk):
+                video_label.imgtk = imgtk
+                video_label.config(image=imgtk)
             
             if self.camera_running:
-                camera_window.after(33, update_frame)
+                camera_window.after(15, update_frame)
         
+        # The capture thread keeps only the newest frame, so a slow driver
+        # read never blocks the Tk loop and stale frames are dropped
+        capture_q = queue.Queue(maxsize=1)
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, args=(self.video_capture, capture_q), daemon=True
+        )
+        self._capture_thread.start()
         update_frame()
     
     def _check_spreadsheet(self, listbox, status_label):
@@ -3199,8 +4110,8 @@ class FaceRecognitionApp:
             
             # Update listbox
             listbox.delete(0, tk.END)
-            for student in sorted(self.seen_today):
-                listbox.insert(tk.END, f"✓ {student}")
+            if self.seen_today:
+                listbox.insert(tk.END, *(f"✓ {student}" for student in sorted(self.seen_today)))
             
             # Update status label
             status_label.config(
@@ -3257,6 +4168,7 @@ class FaceRecognitionApp:
                     return
                 
                 print(f"Connecting to Gemini Live API with key (length: {len(api_key)} characters)...")
+                from gemini_live_api import GeminiLiveAPI
                 self.gemini_live_api = GeminiLiveAPI(api_key)
                 
                 # Set callbacks
@@ -3480,103 +4392,130 @@ class FaceRecognitionApp:
         """Update the transcript display in the live camera window."""
         if hasattr(self, 'live_api_transcript_text'):
             try:
-                # Enable editing
-                self.live_api_transcript_text.config(state=tk.NORMAL)
+                transcript = self.live_api_transcript_text
                 
-                # Configure tags if not already done
-                if not hasattr(self, '_transcript_tags_configured'):
-                    self.live_api_transcript_text.tag_config("user", foreground=COLORS["accent_purple"], font=("Segoe UI", 9, "bold"))
-                    self.live_api_transcript_text.tag_config("response", foreground=COLORS["accent_blue"], font=("Segoe UI", 9, "bold"))
-                    self._transcript_tags_configured = True
-                
-                # Get current content
-                current = self.live_api_transcript_text.get("1.0", tk.END).strip()
+                # Enable editing
+                transcript.config(state=tk.NORMAL)
                 
                 # Remove initial message if present
-                if "💡 Start a Live Call" in current:
-                    self.live_api_transcript_text.delete("1.0", tk.END)
-                    current = ""
+                if self._transcript_has_placeholder:
+                    transcript.delete("1.0", tk.END)
+                    self._transcript_has_placeholder = False
                 
-                # Add new message
+                # Add new message (tags are configured when the widget is built)
                 tag = "response" if is_response else "user"
                 
-                # Insert new text
-                if current:
-                    self.live_api_transcript_text.insert(tk.END, "\n")
-                self.live_api_transcript_text.insert(tk.END, text + "\n", tag)
+                # Insert new text, separated from earlier messages by a blank line,
+                # in a single Tk call
+                has_content = transcript.compare("end-1c", "!=", "1.0")
+                transcript.insert(tk.END, ("\n" if has_content else "") + text + "\n", tag)
                 
                 # Auto-scroll to bottom
-                self.live_api_transcript_text.see(tk.END)
+                transcript.see(tk.END)
                 
-                # Limit transcript length (keep last 50 lines)
-                lines = self.live_api_transcript_text.get("1.0", tk.END).split("\n")
-                if len(lines) > 50:
-                    self.live_api_transcript_text.delete("1.0", f"{len(lines) - 50}.0")
+                # Limit transcript length (keep last 50 lines), counting lines
+                # from the end index instead of copying the whole text out
+                line_count = int(transcript.index(tk.END).split(".")[0])
+                if line_count > 50:
+                    transcript.delete("1.0", f"{line_count - 50}.0")
                 
                 # Disable editing to prevent user modification
-                self.live_api_transcript_text.config(state=tk.DISABLED)
+                transcript.config(state=tk.DISABLED)
             except Exception as e:
                 print(f"Error updating transcript: {e}")
                 import traceback
                 traceback.print_exc()
     
+    def _settings_variables(self):
+        """Tk variables persisted in SETTINGS_PATH, by settings key."""
+        return {
+            "gemini_api_key": self.gemini_api_key,
+            "model_type": self.model_type,
+            "detection_model": self.detection_model,
+            "camera_index": self.camera_index,
+            "camera_flip_horizontal": self.camera_flip_horizontal,
+            "camera_flip_vertical": self.camera_flip_vertical,
+            "camera_rotate": self.camera_rotate,
+        }
+    
+    def _read_settings(self):
+        """Read the settings file; a key from the old plain-text file is migrated in."""
+        settings = {}
+        if SETTINGS_PATH.exists():
+            with SETTINGS_PATH.open("r", encoding="utf-8") as f:
+                settings = json.load(f)
+        if "gemini_api_key" not in settings and LEGACY_API_KEY_PATH.exists():
+            with LEGACY_API_KEY_PATH.open("r", encoding="utf-8") as f:
+                settings["gemini_api_key"] = f.read().strip()
+            print(f"ℹ️ Migrating API key from {LEGACY_API_KEY_PATH} to {SETTINGS_PATH}")
+        return settings
+    
+    def load_app_settings(self):
+        """Load all saved settings into their Tk variables (once, at startup)."""
+        try:
+            settings = self._read_settings()
+        except Exception as e:
+            print(f"❌ Error loading settings: {e}")
+            settings = {}
+        
+        for key, variable in self._settings_variables().items():
+            if key in settings:
+                try:
+                    variable.set(settings[key])
+                except Exception as e:
+                    print(f"⚠️ Ignoring saved setting {key}: {e}")
+        
+        api_key = self.gemini_api_key.get()
+        if api_key:
+            print(f"✓ Gemini API key loaded successfully (length: {len(api_key)} characters)")
+            print(f"   File location: {SETTINGS_PATH.absolute()}")
+        else:
+            print(f"ℹ️ No saved API key found in: {SETTINGS_PATH.absolute()}")
+            print("   Please set it in Settings.")
+    
     def load_gemini_api_key(self):
-        """Load Gemini API key from file if exists."""
+        """Reload the Gemini API key from the settings file."""
         try:
-            key_file = Path("output/gemini_api_key.txt")
-            if key_file.exists():
-                with key_file.open("r", encoding="utf-8") as f:
-                    api_key = f.read().strip()
-                    if api_key:
-                        self.gemini_api_key.set(api_key)
-                        print(f"✓ Gemini API key loaded successfully (length: {len(api_key)} characters)")
-                        print(f"   File location: {key_file.absolute()}")
-                        return True
-                    else:
-                        print("⚠️ API key file exists but is empty")
-                        self.gemini_api_key.set("")  # Set to empty
-                        return False
-            else:
-                print(f"ℹ️ No saved API key found at: {key_file.absolute()}")
-                print("   Please set it in Settings.")
-                return False
+            api_key = str(self._read_settings().get("gemini_api_key", "")).strip()
+            self.gemini_api_key.set(api_key)
+            if api_key:
+                print(f"✓ Gemini API key loaded successfully (length: {len(api_key)} characters)")
+                return True
+            print(f"ℹ️ No saved API key found in: {SETTINGS_PATH.absolute()}")
+            print("   Please set it in Settings.")
+            return False
         except Exception as e:
             print(f"❌ Error loading Gemini API key: {e}")
             import traceback
             traceback.print_exc()
             return False
     
-    def save_gemini_api_key(self):
-        """Save Gemini API key to file."""
+    def save_app_settings(self):
+        """Write all settings to SETTINGS_PATH atomically (temp file + rename)."""
         try:
-            output_dir = Path("output")
-            output_dir.mkdir(exist_ok=True)
-            key_file = output_dir / "gemini_api_key.txt"
-            api_key = self.gemini_api_key.get().strip()
+            settings = {key: variable.get() for key, variable in self._settings_variables().items()}
+            settings["gemini_api_key"] = settings["gemini_api_key"].strip()
             
-            # Write the API key to file
-            with key_file.open("w", encoding="utf-8") as f:
-                f.write(api_key)
+            SETTINGS_PATH.parent.mkdir(exist_ok=True)
+            # Write next to the target and rename over it, so a crash mid-write
+            # leaves the previous settings intact
+            temp_path = SETTINGS_PATH.with_suffix(".json.tmp")
+            with temp_path.open("w", encoding="utf-8") as f:
+                json.dump(settings, f, indent=2)
+            os.replace(temp_path, SETTINGS_PATH)
             
-            # Verify it was written correctly
-            if key_file.exists():
-                with key_file.open("r", encoding="utf-8") as f:
-                    saved_key = f.read().strip()
-                if saved_key == api_key:
-                    if api_key:
-                        print(f"✓ Gemini API key saved and verified successfully (length: {len(api_key)} characters)")
-                        print(f"   File location: {key_file.absolute()}")
-                    else:
-                        print(f"✓ API key cleared (file updated)")
-                    return True
-                else:
-                    print(f"⚠️ Warning: API key verification failed - saved: '{saved_key[:10]}...', expected: '{api_key[:10] if api_key else '(empty)'}...'")
-                    return False
+            # The key now lives in the settings file only
+            if LEGACY_API_KEY_PATH.exists():
+                LEGACY_API_KEY_PATH.unlink()
+            
+            if settings["gemini_api_key"]:
+                print(f"✓ Settings saved (API key length: {len(settings['gemini_api_key'])} characters)")
             else:
-                print(f"⚠️ Warning: API key file was not created at {key_file.absolute()}")
-                return False
+                print(f"✓ Settings saved (no API key)")
+            print(f"   File location: {SETTINGS_PATH.absolute()}")
+            return True
         except Exception as e:
-            print(f"❌ Error saving Gemini API key: {e}")
+            print(f"❌ Error saving settings: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -3602,9 +4541,8 @@ class FaceRecognitionApp:
         
         if file_path:
             file_ext = Path(file_path).suffix.lower()
-            video_extensions = {'.mp4', '.avi', '.mov', '.mkv'}
             
-            if file_ext in video_extensions:
+            if file_ext in VIDEO_EXTENSIONS:
                 # Process video
                 self.test_video(file_path)
             else:
@@ -3612,41 +4550,54 @@ class FaceRecognitionApp:
                 try:
                     image = self.convert_image_to_rgb(file_path)
                     
+                    # Detect on a copy capped at TEST_IMAGE_MAX_SIDE; large photos
+                    # cost the detector time per pixel, not per face
                     detector = self.get_detector()
-                    face_locations = detector.detect_faces(image)
+                    small_image, detection_scale = _downscale_for_detection(image, TEST_IMAGE_MAX_SIDE)
+                    face_locations = _scale_face_locations(
+                        detector.detect_faces(small_image), detection_scale
+                    )
                     
+                    # Encode at full resolution with the scaled-up boxes.
                     # Get encoding model type (HOG -> small, CNN -> large)
                     encoding_model = "small" if self.model_type.get() == "hog" else "large"
+                    face_recognition = _lazy_import("face_recognition")
                     face_encodings = face_recognition.face_encodings(
                         image, face_locations, model=encoding_model
                     )
                     
-                    from PIL import ImageDraw, ImageFont
                     pillow_image = Image.fromarray(image)
                     draw = ImageDraw.Draw(pillow_image)
                     
-                    try:
-                        font_size = max(20, int(image.shape[0] / 30))
-                        font = ImageFont.truetype("arial.ttf", font_size)
-                    except:
-                        try:
-                            font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size)
-                        except:
-                            font = ImageFont.load_default()
+                    font = _load_result_font(max(20, int(image.shape[0] / 30)))
                     
-                    # Get DeepFace analyzer if using DeepFace model
-                    deepface_analyzer = None
-                    if self.detection_model.get() == "deepface":
+                    # The DeepFace model doubles as the analyzer; it was
+                    # loaded for detection above
+                    deepface_analyzer = detector if self.detection_model.get() == "deepface" else None
+                    
+                    face_names = [name or "Unknown" for name in self.recognize_faces(face_encodings)]
+                    
+                    # Analyze all recognized faces in one DeepFace call; the
+                    # crops stay in memory and are already faces, so detection
+                    # is skipped
+                    analyses = {}
+                    if deepface_analyzer:
+                        face_rois = {}
+                        for i, ((top, right, bottom, left), name) in enumerate(zip(face_locations, face_names)):
+                            face_roi = image[top:bottom, left:right]
+                            if name != "Unknown" and face_roi.size > 0:
+                                # DeepFace expects BGR arrays; the test image is RGB
+                                face_rois[i] = cv2.cvtColor(face_roi, cv2.COLOR_RGB2BGR)
                         try:
-                            deepface_analyzer = self.get_detector()
-                        except:
-                            pass
+                            analyses = dict(zip(face_rois, deepface_analyzer.analyze_face_batch(
+                                list(face_rois.values()),
+                                actions=['emotion', 'age', 'gender', 'race'],
+                                detector_backend='skip'
+                            )))
+                        except Exception as e:
+                            print(f"DeepFace analysis error: {e}")
                     
-                    for bounding_box, unknown_encoding in zip(face_locations, face_encodings):
-                        name = self.recognize_face_in_frame(unknown_encoding)
-                        if not name:
-                            name = "Unknown"
-                        
+                    for i, (bounding_box, name) in enumerate(zip(face_locations, face_names)):
                         top, right, bottom, left = bounding_box
                         color = "blue" if name != "Unknown" else "red"
                         
@@ -3656,74 +4607,46 @@ class FaceRecognitionApp:
                         display_text = name
                         
                         # Add DeepFace analysis if available
-                        if deepface_analyzer and name != "Unknown":
+                        analysis = analyses.get(i)
+                        if analysis:
                             try:
-                                # Extract face region
-                                face_roi = image[top:bottom, left:right]
-                                if face_roi.size > 0:
-                                    import tempfile
-                                    import os
-                                    temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-                                    os.close(temp_fd)
-                                    Image.fromarray(face_roi).save(temp_path, 'JPEG')
-                                    
-                                    analysis = deepface_analyzer.analyze_face(
-                                        temp_path,
-                                        actions=['emotion', 'age', 'gender', 'race']
-                                    )
-                                    
-                                    if analysis:
-                                        # Apply calibration if available
-                                        if self.deepface_calibrator and name != "Unknown":
-                                            try:
-                                                analysis = self.deepface_calibrator.calibrate_result(name, analysis)
-                                            except Exception as e:
-                                                print(f"Calibration error: {e}")
-                                        
-                                        emotion = analysis.get('dominant_emotion', 'N/A')
-                                        age = int(analysis.get('age', 0))
-                                        gender = analysis.get('dominant_gender', 'N/A')
-                                        race = analysis.get('dominant_race', 'N/A')
-                                        
-                                        display_text = f"{name}\n{emotion} | {age}y | {gender} | {race}"
-                                    
-                                    os.remove(temp_path)
+                                # Apply calibration if available
+                                if self.deepface_calibrator:
+                                    try:
+                                        analysis = self.deepface_calibrator.calibrate_result(name, analysis)
+                                    except Exception as e:
+                                        print(f"Calibration error: {e}")
+                                
+                                emotion = analysis.get('dominant_emotion', 'N/A')
+                                age = int(analysis.get('age', 0))
+                                gender = analysis.get('dominant_gender', 'N/A')
+                                race = analysis.get('dominant_race', 'N/A')
+                                
+                                display_text = f"{name}\n{emotion} | {age}y | {gender} | {race}"
                             except:
                                 pass
                         
                         text_y = max(0, top - 30)
                         
-                        try:
-                            bbox = draw.textbbox((left, text_y), display_text.split('\n')[0], font=font)
-                            text_left, text_top, text_right, text_bottom = bbox
-                        except:
-                            text_left, text_top, text_right, text_bottom = draw.textbbox(
-                                (left, text_y), display_text.split('\n')[0]
-                            )
-                        
-                        # Calculate height for multi-line text
-                        lines = display_text.split('\n')
-                        line_height = 25
-                        text_height = len(lines) * line_height
+                        # Measure and draw all label lines in one call each
+                        text_left, text_top, text_right, text_bottom = draw.multiline_textbbox(
+                            (left, text_y), display_text, font=font
+                        )
                         
                         padding = 5
                         draw.rectangle(
                             ((text_left - padding, text_top - padding), 
-                             (text_right + padding, text_top + text_height + padding)),
+                             (text_right + padding, text_bottom + padding)),
                             fill=color,
                             outline=color,
                         )
                         
-                        # Draw text (handle multi-line)
-                        current_y = text_top
-                        for line in display_text.split('\n'):
-                            draw.text(
-                                (text_left, current_y),
-                                line,
-                                fill="white",
-                                font=font,
-                            )
-                            current_y += line_height
+                        draw.multiline_text(
+                            (left, text_y),
+                            display_text,
+                            fill="white",
+                            font=font,
+                        )
                     
                     self.show_result_image(pillow_image, file_path)
                 
@@ -3777,58 +4700,128 @@ class FaceRecognitionApp:
         )
         stop_btn.pack(side=tk.RIGHT, padx=20, pady=15)
         
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            messagebox.showerror("Error", f"Could not open video: {video_path}")
+            video_window.destroy()
+            return
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps <= 0:
+            fps = 30.0
+        # Decode every Nth frame and pace playback to the sampled rate
+        skip = max(1, int(fps / TEST_VIDEO_TARGET_FPS))
+        frame_delay = int(1000 * skip / fps)
+        
         self.video_processing = True
         
-        def process_video_frames():
+        # Pipeline: decode thread -> read_q -> recognition thread -> display_q -> Tk.
+        # Both queues block when full, so no video frame is dropped and
+        # decoding the next frame overlaps recognizing the current one
+        read_q = queue.Queue(maxsize=TEST_VIDEO_PREFETCH)
+        display_q = queue.Queue(maxsize=TEST_VIDEO_PREFETCH)
+        preview = FramePreview((980, 600))
+        
+        def put_frame(frame_queue, item):
+            """Wait for room on a queue; give up once processing is stopped."""
+            while self.video_processing:
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def show_error(message):
+            if self.video_processing:
+                self.video_processing = False
+                messagebox.showerror("Error", message)
+                video_window.destroy()
+        
+        def decode_frames():
+            try:
+                while self.video_processing:
+                    # Skip ahead without decoding the frames in between
+                    ret = all(cap.grab() for _ in range(skip - 1))
+                    if ret:
+                        ret, frame = cap.read()
+                    if not ret or not put_frame(read_q, frame):
+                        break
+            except Exception as e:
+                self.root.after(0, lambda err=str(e): show_error(f"Failed to process video: {err}"))
+            finally:
+                cap.release()
+            # None marks the end of the video
+            put_frame(read_q, None)
+        
+        def recognize_frames():
             try:
-                cap = cv2.VideoCapture(str(video_path))
-                if not cap.isOpened():
-                    messagebox.showerror("Error", f"Could not open video: {video_path}")
-                    video_window.destroy()
-                    return
-                
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_delay = int(1000 / fps) if fps > 0 else 33
-                
                 detector = self.get_detector()
+                track_cache = FaceTrackCache()  # Names of faces that have not moved
+                frame_number = 0
+                detection_thumbnail = None  # Motion thumbnail of the last detected frame
+                detection_frame_number = 0
+                face_locations = []
+                face_names = []
+                # Half-size BGR and RGB working frames, allocated on the first
+                # frame and reused since every frame of a video has one size
+                small_frame = None
+                rgb_small_frame = None
                 
-                def process_next_frame():
-                    if not self.video_processing:
-                        cap.release()
-                        video_window.destroy()
-                        return
-                    
-                    ret, frame = cap.read()
-                    if not ret:
-                        cap.release()
-                        status_label.config(text="✓ Video processing complete")
+                while self.video_processing:
+                    try:
+                        frame = read_q.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if frame is None:
+                        put_frame(display_q, None)
                         return
                     
                     # Resize for faster processing
-                    small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-                    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Detect and recognize faces
-                    face_locations = detector.detect_faces(rgb_small_frame)
-                    # Get encoding model type (HOG -> small, CNN -> large)
-                    encoding_model = "small" if self.model_type.get() == "hog" else "large"
-                    face_encodings = face_recognition.face_encodings(
-                        rgb_small_frame, face_locations, model=encoding_model
-                    )
+                    if small_frame is None:
+                        small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+                        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+                    else:
+                        cv2.resize(frame, small_frame.shape[1::-1], dst=small_frame)
+                        cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=rgb_small_frame)
                     
-                    face_names = []
-                    for face_encoding in face_encodings:
-                        name = self.recognize_face_in_frame(face_encoding)
-                        face_names.append(name if name else "Unknown")
+                    frame_number += skip
                     
-                    # Draw on full frame
-                    scale_factor = 2
-                    for (top, right, bottom, left), name in zip(face_locations, face_names):
-                        top = int(top * scale_factor)
-                        right = int(right * scale_factor)
-                        bottom = int(bottom * scale_factor)
-                        left = int(left * scale_factor)
+                    # While the scene is still, keep the previous boxes and
+                    # names instead of running the detector again
+                    thumbnail = _motion_thumbnail(small_frame)
+                    if (detection_thumbnail is None
+                            or frame_number - detection_frame_number >= MOTION_MAX_SKIP_FRAMES
+                            or _motion_score(thumbnail, detection_thumbnail) >= MOTION_THRESHOLD):
+                        detection_thumbnail = thumbnail
+                        detection_frame_number = frame_number
+                        
+                        # Detect and recognize faces; the BGR frame goes to the
+                        # detector as is, skipping its RGB -> PIL -> BGR round trip
+                        face_locations = detector.detect_faces_cv2(small_frame)
                         
+                        # Reuse names of faces that barely moved; only encode the rest
+                        face_names = [
+                            track_cache.lookup(location, frame_number) for location in face_locations
+                        ]
+                        to_encode = [i for i, name in enumerate(face_names) if name is None]
+                        if to_encode:
+                            # Encoding model (HOG -> small, CNN -> large), kept current
+                            # by traces since Tk variables are not read off the Tk thread
+                            face_recognition = _lazy_import("face_recognition")
+                            face_encodings = face_recognition.face_encodings(
+                                rgb_small_frame, [face_locations[i] for i in to_encode],
+                                model=self.camera_settings["encoding_model"]
+                            )
+                            for i, name in zip(to_encode, self.recognize_faces(face_encodings)):
+                                face_names[i] = name if name else "Unknown"
+                                track_cache.update(face_locations[i], face_names[i], frame_number)
+                        face_names = [name or "Unknown" for name in face_names]
+                    
+                    # Draw on full frame, with the boxes scaled back up once
+                    for (top, right, bottom, left), name in zip(
+                        _scale_face_locations(face_locations, 0.5), face_names
+                    ):
                         color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
                         cv2.rectangle(frame, (left, top), (right, bottom), color, 3)
                         
@@ -3841,25 +4834,66 @@ class FaceRecognitionApp:
                             font, 0.7, (255, 255, 255), 2
                         )
                     
-                    # Display frame
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    img = Image.fromarray(frame_rgb)
-                    img = img.resize((980, 600), Image.Resampling.LANCZOS)
-                    imgtk = ImageTk.PhotoImage(image=img)
+                    put_frame(display_q, frame)
                     
+            except Exception as e:
+                self.root.after(0, lambda err=str(e): show_error(f"Failed to process video: {err}"))
+        
+        # Playback clock: when frame N is due on screen, in perf_counter seconds
+        playback_start = time.perf_counter()
+        frames_shown = 0
+        
+        def drain_display():
+            nonlocal playback_start, frames_shown
+            if not self.video_processing:
+                return
+            
+            # If Tk fell behind the video's own pace, skip to the newest frame
+            # that is due instead of painting every stale one
+            now = time.perf_counter()
+            due = (now - playback_start) * 1000 / frame_delay
+            frame = None
+            finished = False
+            while True:
+                try:
+                    item = display_q.get_nowait()
+                except queue.Empty:
+                    # Waiting on recognition, not on Tk: restart the clock so
+                    # the newest frame is the one due now
+                    pending = frames_shown - 1 if frame is not None else frames_shown
+                    playback_start = now - pending * frame_delay / 1000
+                    break
+                if item is None:
+                    finished = True
+                    break
+                frame = item
+                frames_shown += 1
+                if frames_shown >= due:
+                    break
+            
+            if frame is not None:
+                imgtk = preview.render(frame)
+                if video_label.cget("image") != str(imgtk):
                     video_label.imgtk = imgtk
                     video_label.config(image=imgtk)
-                    
-                    # Schedule next frame
-                    video_window.after(frame_delay, process_next_frame)
-                
-                process_next_frame()
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to process video: {str(e)}")
-                video_window.destroy()
+            
+            if finished:
+                status_label.config(text="✓ Video processing complete")
+                return
+            
+            # Schedule next frame for when it is due, or check again shortly
+            # if recognition is behind
+            if frame is None:
+                video_window.after(15, drain_display)
+            else:
+                next_due = playback_start + frames_shown * frame_delay / 1000
+                video_window.after(max(1, int((next_due - time.perf_counter()) * 1000)), drain_display)
         
-        threading.Thread(target=process_video_frames, daemon=True).start()
+        video_window.protocol("WM_DELETE_WINDOW", lambda: self.stop_video_processing(video_window))
+        
+        threading.Thread(target=decode_frames, daemon=True).start()
+        threading.Thread(target=recognize_frames, daemon=True).start()
+        drain_display()
     
     def stop_video_processing(self, window):
         """Stop video processing."""
@@ -3997,12 +5031,12 @@ class FaceRecognitionApp:
         listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=listbox.yview)
         
-        current_encodings = self.get_current_encodings()
-        if current_encodings:
-            people = sorted(set(current_encodings["names"]))
-            for person in people:
-                count = current_encodings["names"].count(person)
-                listbox.insert(tk.END, f"👤 {person} ({count} encoding(s))")
+        # Encodings per person are counted when the encodings load or change
+        counts = self._encoding_counts.get(self.detection_model.get())
+        if counts:
+            listbox.insert(tk.END, *(
+                f"👤 {person} ({counts[person]} encoding(s))" for person in sorted(counts)
+            ))
         else:
             listbox.insert(tk.END, "No registered people")
         
@@ -4230,7 +5264,7 @@ class FaceRecognitionApp:
                     pass
             # Only auto-save if key is not empty (to avoid clearing on startup)
             if self.gemini_api_key.get().strip():
-                self._save_timer = self.root.after(500, lambda: self.save_gemini_api_key())  # Save 500ms after last change
+                self._save_timer = self.root.after(500, lambda: self.save_app_settings())  # Save 500ms after last change
         
         # Trace the variable to auto-save on changes
         self.gemini_api_key.trace("w", update_status)
@@ -4251,10 +5285,10 @@ class FaceRecognitionApp:
     
     def save_settings(self, window):
         """Save settings and close window."""
-        # Always save Gemini API key when Settings closes (explicit save)
+        # Always save settings when the Settings window closes (explicit save)
         print("=" * 50)
-        print("Saving API key from Settings window...")
-        saved = self.save_gemini_api_key()
+        print("Saving settings from Settings window...")
+        saved = self.save_app_settings()
         print("=" * 50)
         
         if saved:
@@ -4263,13 +5297,13 @@ class FaceRecognitionApp:
                 "Success", 
                 "Settings saved successfully!\n\n"
                 "API key has been saved and will persist when you restart the app.\n\n"
-                f"File location: output/gemini_api_key.txt"
+                f"File location: {SETTINGS_PATH}"
             )
         else:
             # Still close but warn user
             response = messagebox.askyesno(
                 "Save Warning",
-                "There was an issue saving the API key.\n\n"
+                "There was an issue saving the settings.\n\n"
                 "Do you want to close anyway?\n"
                 "(You can try saving again later)"
             )
@@ -4281,15 +5315,15 @@ def main():
     root = tk.Tk()
     app = FaceRecognitionApp(root)
     
-    # Save API key when app closes
+    # Save settings when app closes
     def on_closing():
-        # Save API key before closing (always save, even if empty)
-        print("Saving API key before app closes...")
+        # Save settings before closing (always save, even if the key is empty)
+        print("Saving settings before app closes...")
         try:
-            app.save_gemini_api_key()
-            print("✓ API key saved on app close")
+            app.save_app_settings()
+            print("✓ Settings saved on app close")
         except Exception as e:
-            print(f"⚠️ Error saving API key on close: {e}")
+            print(f"⚠️ Error saving settings on close: {e}")
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -3,15 +3,38 @@ DeepFace detector for face detection and recognition with emotion, age, race, an
 Based on: https://github.com/serengil/deepface
 """
 
+import hashlib
+import os
+import urllib.request
 import numpy as np
 from pathlib import Path
 import cv2
-from PIL import Image
 
-# Lazy import to prevent startup crashes
+# Lazy imports to prevent startup crashes
 DeepFace = None
+RetinaFace = None
+
+# DeepFace attribute model names for each analyze() action
+ATTRIBUTE_MODELS = {
+    'emotion': 'Emotion',
+    'age': 'Age',
+    'gender': 'Gender',
+    'race': 'Race',
+}
 retinaface_available = False
 
+# YuNet ONNX face detector (cv2.FaceDetectorYN) used when RetinaFace is unavailable
+YUNET_MODEL_PATH = Path("models") / "face_detection_yunet_2023mar.onnx"
+YUNET_MODEL_URL = (
+    "https://github.com/opencv/opencv_zoo/raw/main/models/"
+    "face_detection_yunet/face_detection_yunet_2023mar.onnx"
+)
+# SHA-256 of the pinned model file; downloads that do not match are discarded
+YUNET_MODEL_SHA256 = "8f2383e4dd3cfbb4553ea8718107fc0423210dc964f9f4280604804ed2552fa4"
+YUNET_DOWNLOAD_TIMEOUT = 30  # seconds
+YUNET_SCORE_THRESHOLD = 0.9
+YUNET_NMS_THRESHOLD = 0.3
+
 def _import_deepface():
     """Lazy import of DeepFace."""
     global DeepFace, retinaface_available
@@ -29,6 +52,36 @@ def _import_deepface():
     return DeepFace
 
 
+def _import_retinaface():
+    """Lazy import of RetinaFace; returns None if it is not installed."""
+    global RetinaFace
+    if RetinaFace is None:
+        try:
+            from retinaface import RetinaFace as RF
+            RetinaFace = RF
+        except Exception:
+            RetinaFace = False  # Don't retry the import on every frame
+    return RetinaFace or None
+
+
+def _download_yunet_model():
+    """Download the YuNet model, verify its checksum and move it into place."""
+    YUNET_MODEL_PATH.parent.mkdir(exist_ok=True)
+    tmp_path = YUNET_MODEL_PATH.with_name(YUNET_MODEL_PATH.name + ".tmp")
+    try:
+        with urllib.request.urlopen(YUNET_MODEL_URL, timeout=YUNET_DOWNLOAD_TIMEOUT) as response:
+            data = response.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != YUNET_MODEL_SHA256:
+            raise ValueError(f"YuNet model checksum mismatch (got {digest})")
+        tmp_path.write_bytes(data)
+        # Atomic, so an interrupted download never leaves a partial model
+        os.replace(tmp_path, YUNET_MODEL_PATH)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
 class DeepFaceDetector:
     """Face detector and analyzer using DeepFace library."""
     
@@ -36,8 +89,37 @@ class DeepFaceDetector:
         """Initialize DeepFace detector."""
         _import_deepface()
         self.model_loaded = True
+        self.attribute_models = {}  # action -> built DeepFace model
+        self.retinaface_model = None  # Built on first detection
+        self.yunet = None  # OpenCV fallback detectors; False once YuNet failed
+        self.haar_cascade = None
         print("✓ DeepFace detector initialized!")
     
+    def build_attribute_models(self, actions=None):
+        """
+        Build the attribute models once so the first analysis does not stall.
+        
+        DeepFace keeps built models in a process-wide cache, so later
+        analyze() calls reuse these instead of loading weights again.
+        
+        Args:
+            actions: List of actions ['emotion', 'age', 'gender', 'race'] or None for all
+        """
+        for action in actions or ATTRIBUTE_MODELS:
+            if action in self.attribute_models:
+                continue
+            try:
+                try:
+                    model = DeepFace.build_model(
+                        model_name=ATTRIBUTE_MODELS[action], task="facial_attribute"
+                    )
+                except TypeError:
+                    # Older DeepFace releases take the model name only
+                    model = DeepFace.build_model(ATTRIBUTE_MODELS[action])
+                self.attribute_models[action] = model
+            except Exception as e:
+                print(f"Warning: Could not build DeepFace {action} model: {str(e)[:100]}")
+    
     def detect_faces(self, image):
         """
         Detect faces in an image.
@@ -48,71 +130,100 @@ class DeepFaceDetector:
         Returns:
             List of face locations in format (top, right, bottom, left)
         """
-        try:
-            # DeepFace can use multiple backends - try RetinaFace first, then OpenCV
-            import tempfile
-            import os
-            
-            temp_path = None
+        return self._detect_bgr(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    
+    def _detect_bgr(self, frame):
+        """Detect faces in a BGR array with RetinaFace, falling back to OpenCV."""
+        # RetinaFace takes BGR arrays directly, so nothing is written to disk
+        retinaface = _import_retinaface()
+        if retinaface is not None:
             try:
-                # Create temporary file
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-                os.close(temp_fd)
-                
-                # Save image to temp file
-                temp_image = Image.fromarray(image)
-                temp_image.save(temp_path, 'JPEG')
+                if self.retinaface_model is None and hasattr(retinaface, "build_model"):
+                    self.retinaface_model = retinaface.build_model()
+                detections = retinaface.detect_faces(frame, model=self.retinaface_model)
                 
-                # Try to get face locations using RetinaFace detector (if available)
-                try:
-                    from retinaface import RetinaFace
-                    detections = RetinaFace.detect_faces(temp_path)
-                    
-                    face_locations = []
+                face_locations = []
+                if isinstance(detections, dict):
                     for face_key, face_data in detections.items():
-                        facial_area = face_data['facial_area']
-                        x1, y1, x2, y2 = facial_area
-                        top = int(y1)
-                        right = int(x2)
-                        bottom = int(y2)
-                        left = int(x1)
-                        face_locations.append((top, right, bottom, left))
-                    
-                    if face_locations:
-                        return face_locations
-                except:
-                    pass  # RetinaFace not available, fall through to OpenCV
+                        x1, y1, x2, y2 = face_data['facial_area']
+                        face_locations.append((int(y1), int(x2), int(y2), int(x1)))
                 
-                # Fallback to OpenCV for detection
-                return self._detect_with_opencv(image)
-                
-            finally:
-                # Clean up temp file
-                if temp_path and os.path.exists(temp_path):
-                    try:
-                        os.remove(temp_path)
-                    except:
-                        pass
-                        
+                if face_locations:
+                    return face_locations
+            except Exception:
+                pass  # RetinaFace failed, fall through to OpenCV
+        
+        # Fallback to OpenCV for detection
+        return self._detect_with_opencv(frame)
+    
+    def build_fallback_detector(self):
+        """
+        Download (once) and load the YuNet model used when RetinaFace finds nothing.
+        
+        Called from the prewarm path so detection never waits on the network;
+        if it fails, the OpenCV fallback keeps using the Haar cascade.
+        """
+        if self.yunet is not None or not hasattr(cv2, "FaceDetectorYN"):
+            return
+        try:
+            if not YUNET_MODEL_PATH.exists():
+                print("Downloading YuNet face detection model...")
+                _download_yunet_model()
+            self._create_yunet()
         except Exception as e:
-            print(f"Error in DeepFace detection: {e}")
-            # Fallback to OpenCV
-            return self._detect_with_opencv(image)
+            self.yunet = False
+            print(f"Warning: YuNet unavailable, using Haar cascade: {str(e)[:100]}")
     
-    def _detect_with_opencv(self, image):
-        """Fallback face detection using OpenCV."""
+    def _create_yunet(self):
+        """Load YuNet from YUNET_MODEL_PATH, deleting the file if OpenCV rejects it."""
         try:
-            import cv2
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+            self.yunet = cv2.FaceDetectorYN.create(
+                str(YUNET_MODEL_PATH), "", (320, 320),
+                score_threshold=YUNET_SCORE_THRESHOLD,
+                nms_threshold=YUNET_NMS_THRESHOLD,
+                top_k=5000
+            )
+        except cv2.error:
+            # A corrupt file would otherwise pin the fallback to Haar for
+            # good; without it the next prewarm downloads a fresh copy
+            YUNET_MODEL_PATH.unlink(missing_ok=True)
+            raise
+    
+    def _get_yunet(self):
+        """YuNet detector if its model is already on disk; never downloads."""
+        if self.yunet is None and hasattr(cv2, "FaceDetectorYN") and YUNET_MODEL_PATH.exists():
+            try:
+                self._create_yunet()
+            except Exception as e:
+                self.yunet = False
+                print(f"Warning: YuNet unavailable, using Haar cascade: {str(e)[:100]}")
+        return self.yunet or None
+    
+    def _detect_with_opencv(self, frame):
+        """Fallback face detection using OpenCV's YuNet, or a Haar cascade (BGR input)."""
+        try:
+            yunet = self._get_yunet()
+            if yunet is not None:
+                height, width = frame.shape[:2]
+                yunet.setInputSize((width, height))
+                _, faces = yunet.detect(frame)
+                if faces is None:
+                    return []
+                boxes = faces[:, :4]
+            else:
+                if self.haar_cascade is None:
+                    self.haar_cascade = cv2.CascadeClassifier(
+                        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                    )
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                boxes = self.haar_cascade.detectMultiScale(gray, 1.1, 4)
             
             face_locations = []
-            for (x, y, w, h) in faces:
-                top = int(y)
+            for (x, y, w, h) in boxes:
+                top = max(int(y), 0)
                 right = int(x + w)
                 bottom = int(y + h)
-                left = int(x)
+                left = max(int(x), 0)
                 face_locations.append((top, right, bottom, left))
             
             return face_locations
@@ -120,14 +231,16 @@ class DeepFaceDetector:
             print(f"Error in OpenCV fallback detection: {e}")
             return []
     
-    def analyze_face(self, image_path, actions=None):
+    def analyze_face(self, image_path, actions=None, detector_backend='retinaface'):
         """
         Analyze face for emotion, age, gender, and race.
         Handles partial failures gracefully - if one action fails, others still work.
         
         Args:
-            image_path: Path to image file or numpy array
+            image_path: Path to image file or BGR numpy array (arrays skip any disk I/O)
             actions: List of actions ['emotion', 'age', 'gender', 'race'] or None for all
+            detector_backend: DeepFace face detector; use 'skip' for images that
+                are already cropped to a face
             
         Returns:
             Dictionary with analysis results (may be partial if some actions fail)
@@ -135,6 +248,23 @@ class DeepFaceDetector:
         if actions is None:
             actions = ['emotion', 'age', 'gender', 'race']
         
+        # All actions in one call share the image preprocessing (and the face
+        # detection, unless it is skipped)
+        try:
+            action_result = DeepFace.analyze(
+                img_path=image_path,
+                actions=list(actions),
+                enforce_detection=False,
+                detector_backend=detector_backend,
+                silent=True  # Suppress progress bars
+            )
+            if isinstance(action_result, list):
+                action_result = action_result[0]
+            if action_result:
+                return action_result
+        except Exception:
+            pass  # Retry action by action below to keep the ones that work
+        
         result = {}
         
         # Try each action separately so failures don't break everything
@@ -144,7 +274,7 @@ class DeepFaceDetector:
                     img_path=image_path,
                     actions=[action],  # Analyze one at a time
                     enforce_detection=False,
-                    detector_backend='retinaface',
+                    detector_backend=detector_backend,
                     silent=True  # Suppress progress bars
                 )
                 
@@ -170,6 +300,52 @@ class DeepFaceDetector:
         
         return result
     
+    def analyze_face_batch(self, images, actions=None, detector_backend='skip'):
+        """
+        Analyze several face images with one DeepFace call.
+        
+        Recent DeepFace releases accept a list of images and run each
+        attribute model on the whole batch; older ones reject it, in which
+        case the images are analyzed one by one.
+        
+        Args:
+            images: List of BGR numpy arrays (usually face crops)
+            actions: List of actions ['emotion', 'age', 'gender', 'race'] or None for all
+            detector_backend: DeepFace face detector; 'skip' for cropped faces
+            
+        Returns:
+            List with one analysis dictionary per image (see analyze_face)
+        """
+        if actions is None:
+            actions = ['emotion', 'age', 'gender', 'race']
+        if not images:
+            return []
+        
+        if len(images) > 1:
+            try:
+                batch_result = DeepFace.analyze(
+                    img_path=list(images),
+                    actions=list(actions),
+                    enforce_detection=False,
+                    detector_backend=detector_backend,
+                    silent=True  # Suppress progress bars
+                )
+                if isinstance(batch_result, list) and len(batch_result) == len(images):
+                    # One entry per image: a list of faces, or a single face dict
+                    results = [
+                        image_result[0] if isinstance(image_result, list) else image_result
+                        for image_result in batch_result
+                    ]
+                    if all(isinstance(result, dict) for result in results):
+                        return results
+            except Exception:
+                pass  # No batch support (or a failing action); analyze one by one
+        
+        return [
+            self.analyze_face(image, actions=actions, detector_backend=detector_backend)
+            for image in images
+        ]
+    
     def verify_faces(self, img1_path, img2_path, model_name='VGG-Face'):
         """
         Verify if two faces belong to the same person.
@@ -221,6 +397,20 @@ class DeepFaceDetector:
             print(f"Error in DeepFace representation: {e}")
             return None
     
+    def detect_batch(self, images):
+        """
+        Detect faces in a list of images.
+        
+        Each image goes through detect_faces (RetinaFace with OpenCV fallback).
+        
+        Args:
+            images: List of RGB numpy arrays
+            
+        Returns:
+            List of face location lists, in the same order as images
+        """
+        return [self.detect_faces(image) for image in images]
+    
     def detect_faces_cv2(self, frame):
         """
         Detect faces in OpenCV frame (BGR format).
@@ -231,7 +421,17 @@ class DeepFaceDetector:
         Returns:
             List of face locations in format (top, right, bottom, left)
         """
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.detect_faces(rgb_frame)
+        return self._detect_bgr(frame)
+    
+    def detect_batch_cv2(self, frames):
+        """
+        Detect faces in several OpenCV frames (BGR format).
+        
+        Args:
+            frames: List of OpenCV frames (BGR)
+            
+        Returns:
+            List with one list of (top, right, bottom, left) locations per frame
+        """
+        return [self.detect_faces_cv2(frame) for frame in frames]
 
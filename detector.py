@@ -1,16 +1,27 @@
 # detector.py
 
 import argparse
-import pickle
-from collections import Counter
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import cv2
 import face_recognition
 from PIL import Image, ImageDraw
 import numpy as np
 from yolo_face_detector import get_detector
+from face_gallery import FaceGallery, load_encodings, save_encodings
+from face_encoding import ENCODING_BATCH_SIZE, batch_face_encodings
 
-DEFAULT_ENCODINGS_PATH = Path("output/encodings.pkl")
+DEFAULT_ENCODINGS_PATH = Path("output/encodings.npy")
+# Threads decoding the next batch of training images during detection
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+# Longest side (pixels) of the copy of an image handed to the face detector;
+# faces are still encoded from the full-resolution image
+DETECTION_MAX_SIDE = 800
+# Maximum encoding distance for a match (face_recognition.compare_faces default)
+MATCH_TOLERANCE = 0.6
 BOUNDING_BOX_COLOR = "blue"
 TEXT_COLOR = "white"
 
@@ -21,13 +32,46 @@ Path("validation").mkdir(exist_ok=True)
 
 def convert_image_to_rgb(image_path):
     """Convert image to RGB format."""
-    # Load image using PIL for better compatibility
+    # OpenCV decodes JPEG/PNG with SIMD; imdecode (rather than imread)
+    # also handles non-ASCII paths on Windows. EXIF orientation is
+    # ignored to match what Pillow returned before.
+    try:
+        bgr_image = cv2.imdecode(
+            np.fromfile(str(image_path), dtype=np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+    except (OSError, cv2.error):
+        bgr_image = None
+    if bgr_image is not None:
+        return cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
+
+    # Formats OpenCV cannot decode (e.g. GIF on older builds)
     pil_image = Image.open(image_path)
     if pil_image.mode != 'RGB':
         pil_image = pil_image.convert('RGB')
     return np.array(pil_image, dtype=np.uint8)
 
 
+def _detect_downscaled(detector, images):
+    """Detect faces on copies of images capped at DETECTION_MAX_SIDE; boxes are in full-size coordinates."""
+    small_images = []
+    scales = []
+    for image in images:
+        scale = min(1.0, DETECTION_MAX_SIDE / max(image.shape[:2]))
+        if scale < 1.0:
+            image = cv2.resize(image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_images.append(image)
+        scales.append(scale)
+
+    batch_locations = []
+    for face_locations, scale in zip(detector.detect_batch(small_images), scales):
+        if scale < 1.0 and face_locations:
+            boxes = np.asarray(face_locations, dtype=np.float64).reshape(-1, 4) / scale
+            face_locations = [tuple(box) for box in boxes.astype(np.int64).tolist()]
+        batch_locations.append(face_locations)
+    return batch_locations
+
+
 def encode_known_faces(
     model: str = "hog", encodings_location: Path = DEFAULT_ENCODINGS_PATH
 ) -> None:
@@ -40,47 +84,102 @@ def encode_known_faces(
     processed_count = 0
     error_count = 0
     image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.JPG', '.JPEG', '.PNG', '.BMP'}
+    filepaths = [
+        filepath for filepath in Path("training").glob("*/*")
+        if filepath.is_file() and filepath.suffix in image_extensions
+    ]
+    detector = get_detector()
+    decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+
+    def decode_batch(start):
+        """Start decoding a batch of images to RGB on the worker threads."""
+        return [
+            (filepath, decode_pool.submit(convert_image_to_rgb, filepath))
+            for filepath in filepaths[start:start + ENCODING_BATCH_SIZE]
+        ]
+
+    # Detect and encode ENCODING_BATCH_SIZE images per detector and dlib call,
+    # while the next batch is decoded; detection and encoding stay on this
+    # thread since they share one detector
+    next_batch = decode_batch(0)
+    for start in range(0, len(filepaths), ENCODING_BATCH_SIZE):
+        current_batch = next_batch
+        next_batch = decode_batch(start + ENCODING_BATCH_SIZE)
 
-    for filepath in Path("training").glob("*/*"):
-        if filepath.is_file() and filepath.suffix in image_extensions:
-            name = filepath.parent.name
+        batch_paths = []
+        batch_images = []
+        for filepath, decoded in current_batch:
             try:
-                # Convert image to RGB format
-                image = convert_image_to_rgb(filepath)
-                
-                # Detect faces using YOLOv8
-                detector = get_detector()
-                face_locations = detector.detect_faces(image)
-                
-                if not face_locations:
-                    print(f"No face found in {filepath.name}")
+                batch_images.append(decoded.result())
+                batch_paths.append(filepath)
+            except Exception as e:
+                print(f"Error processing {filepath}: {e}")
+                error_count += 1
+        if not batch_paths:
+            continue
+
+        # Detect faces using YOLO on downscaled copies; if the batch fails,
+        # retry image by image so one bad file does not sink the others
+        try:
+            batch_locations = _detect_downscaled(detector, batch_images)
+        except Exception as e:
+            print(f"Batched detection failed, detecting images one by one: {e}")
+            batch_locations = []
+            for filepath, image in zip(batch_paths, batch_images):
+                try:
+                    batch_locations.append(_detect_downscaled(detector, [image])[0])
+                except Exception as e:
+                    print(f"Error processing {filepath}: {e}")
                     error_count += 1
-                    continue
-                
-                face_encodings = face_recognition.face_encodings(image, face_locations)
-                
-                if not face_encodings:
-                    print(f"Failed to encode face in {filepath.name}")
+                    batch_locations.append(None)
+
+        for filepath, face_locations in zip(batch_paths, batch_locations):
+            if face_locations is not None and not face_locations:
+                print(f"No face found in {filepath.name}")
+                error_count += 1
+
+        found = [i for i, locations in enumerate(batch_locations) if locations]
+        if not found:
+            continue
+        try:
+            batch_encodings = batch_face_encodings(
+                [batch_images[i] for i in found], [batch_locations[i] for i in found]
+            )
+        except Exception as e:
+            print(f"Batched encoding failed, encoding images one by one: {e}")
+            batch_encodings = None
+
+        for position, i in enumerate(found):
+            if batch_encodings is not None:
+                face_encodings = batch_encodings[position]
+            else:
+                try:
+                    face_encodings = face_recognition.face_encodings(
+                        batch_images[i], batch_locations[i]
+                    )
+                except Exception as e:
+                    print(f"Error processing {batch_paths[i]}: {e}")
                     error_count += 1
                     continue
 
-                for encoding in face_encodings:
-                    names.append(name)
-                    encodings.append(encoding)
-                
-                processed_count += 1
-            except Exception as e:
-                print(f"Error processing {filepath}: {e}")
+            if not face_encodings:
+                print(f"Failed to encode face in {batch_paths[i].name}")
                 error_count += 1
+                continue
+
+            name = batch_paths[i].parent.name
+            for encoding in face_encodings:
+                names.append(name)
+                encodings.append(encoding)
+            processed_count += 1
+    decode_pool.shutdown()
 
     if not names:
         print(f"\nERROR: No faces found in any training images!")
         print(f"Processed: {processed_count} files, Errors: {error_count} files")
         return
 
-    name_encodings = {"names": names, "encodings": encodings}
-    with encodings_location.open(mode="wb") as f:
-        pickle.dump(name_encodings, f)
+    save_encodings(encodings_location, names, encodings)
     
     print(f"\n✓ Encoded {len(names)} face(s) from {len(set(names))} person(s)")
     print(f"✓ Successfully processed {processed_count} image(s)")
@@ -88,18 +187,39 @@ def encode_known_faces(
         print(f"⚠ {error_count} image(s) had issues")
 
 
-def _recognize_face(unknown_encoding, loaded_encodings):
-    """Compare unknown face encoding with known encodings and return best match."""
-    boolean_matches = face_recognition.compare_faces(
-        loaded_encodings["encodings"], unknown_encoding
-    )
-    votes = Counter(
-        name
-        for match, name in zip(boolean_matches, loaded_encodings["names"])
-        if match
+def _recognize_faces(unknown_encodings, gallery):
+    """Match all unknown encodings of an image at once; returns the best name (or None) per face."""
+    if len(unknown_encodings) == 0:
+        return []
+    # Votes come from the nearest matches within the tolerance: one exact
+    # distance matrix for small galleries, an ANN index search for large ones
+    names = []
+    for match_indices, _ in gallery.candidates_batch(unknown_encodings, MATCH_TOLERANCE):
+        if len(match_indices) > 0:
+            votes = np.bincount(gallery.person_ids[match_indices])
+            names.append(gallery.person_names[votes.argmax()])
+        else:
+            names.append(None)
+    return names
+
+
+@functools.lru_cache(maxsize=1)
+def _load_gallery(encodings_location, mtime):
+    """
+    Load the encodings once and keep the gallery across recognize_faces calls.
+
+    mtime is part of the cache key so re-training in the same process is
+    picked up.
+    """
+    loaded_encodings = load_encodings(encodings_location)
+    if loaded_encodings is None:
+        raise FileNotFoundError(f"Encodings file not found at {encodings_location}")
+    return FaceGallery(
+        loaded_encodings["names"],
+        loaded_encodings["encodings"],
+        encodings_path=encodings_location,
+        sq_norms=loaded_encodings.get("sq_norms"),
     )
-    if votes:
-        return votes.most_common(1)[0][0]
 
 
 def recognize_faces(
@@ -108,15 +228,20 @@ def recognize_faces(
     encodings_location: Path = DEFAULT_ENCODINGS_PATH,
 ) -> None:
     """Recognize faces in an image and display results."""
-    with encodings_location.open(mode="rb") as f:
-        loaded_encodings = pickle.load(f)
+    encodings_location = Path(encodings_location)
+    if not encodings_location.exists():
+        # May still be a legacy pickle that load_encodings migrates
+        mtime = None
+    else:
+        mtime = encodings_location.stat().st_mtime_ns
+    gallery = _load_gallery(encodings_location, mtime)
 
     # Convert image to RGB format
     input_image = convert_image_to_rgb(image_location)
 
     # Detect faces using YOLOv8
     detector = get_detector()
-    input_face_locations = detector.detect_faces(input_image)
+    input_face_locations = _detect_downscaled(detector, [input_image])[0]
     input_face_encodings = face_recognition.face_encodings(
         input_image, input_face_locations
     )
@@ -124,10 +249,9 @@ def recognize_faces(
     pillow_image = Image.fromarray(input_image)
     draw = ImageDraw.Draw(pillow_image)
 
-    for bounding_box, unknown_encoding in zip(
-        input_face_locations, input_face_encodings
+    for bounding_box, name in zip(
+        input_face_locations, _recognize_faces(input_face_encodings, gallery)
     ):
-        name = _recognize_face(unknown_encoding, loaded_encodings)
         if not name:
             name = "Unknown"
         _display_face(draw, bounding_box, name)
@@ -0,0 +1,65 @@
+"""
+Batched dlib face encodings shared by the app and the command-line detector.
+
+face_recognition.face_encodings() runs dlib's ResNet once per image; dlib can
+embed the faces of many images in one descriptor call instead.
+"""
+
+import numpy as np
+
+# Training images whose faces are encoded together in one dlib call
+ENCODING_BATCH_SIZE = 16
+
+# face_recognition (dlib) is heavy - import lazily
+face_recognition = None
+dlib = None
+
+
+def _import_face_recognition():
+    """Lazy import of face_recognition and dlib."""
+    global face_recognition, dlib
+    if face_recognition is None:
+        import face_recognition as _face_recognition
+        import dlib as _dlib
+        face_recognition = _face_recognition
+        dlib = _dlib
+    return face_recognition
+
+
+def batch_face_encodings(images, locations_per_image, model="small", num_jitters=1):
+    """
+    Compute face encodings for several images with one dlib descriptor call.
+
+    Args:
+        images: List of RGB images
+        locations_per_image: One list of (top, right, bottom, left) boxes per image
+        model: Landmark model, "small" (5 points) or "large" (68 points)
+        num_jitters: Re-samples per face (as in face_recognition.face_encodings)
+
+    Returns:
+        List with one list of 128-D encodings per image
+    """
+    _import_face_recognition()
+    api = face_recognition.api
+    try:
+        batch_shapes = []
+        for image, face_locations in zip(images, locations_per_image):
+            shapes = dlib.full_object_detections()
+            for landmarks in api._raw_face_landmarks(image, face_locations, model):
+                shapes.append(landmarks)
+            batch_shapes.append(shapes)
+        batch_descriptors = api.face_encoder.compute_face_descriptor(
+            list(images), batch_shapes, num_jitters
+        )
+    except (AttributeError, TypeError):
+        # dlib builds without the batched descriptor API
+        return [
+            face_recognition.face_encodings(
+                image, face_locations, num_jitters=num_jitters, model=model
+            )
+            for image, face_locations in zip(images, locations_per_image)
+        ]
+    return [
+        [np.array(descriptor) for descriptor in descriptors]
+        for descriptors in batch_descriptors
+    ]
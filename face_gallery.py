@@ -0,0 +1,412 @@
+"""
+Known-face gallery storage for the face recognition app.
+
+Encodings are stored as a float32 ``.npy`` matrix with a JSON sidecar holding
+the matching names, so they can be memory-mapped on demand instead of being
+unpickled for every model at startup.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+ENCODING_DIM = 128
+
+# Galleries at least this large are searched through an ANN index
+# (FAISS IVF, or HNSW from hnswlib when FAISS is not installed)
+IVF_MIN_SIZE = 2000
+IVF_NPROBE = 8
+# Nearest neighbours fetched from the index before exact re-ranking
+ANN_NEIGHBORS = 16
+# Bumped whenever the persisted index type changes so stale files are rebuilt
+INDEX_FORMAT = "ivf_sq8"
+# HNSW graph degree, build-time and query-time candidate list sizes
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# FAISS and hnswlib are optional and heavy - import lazily
+faiss = None
+_faiss_checked = False
+hnswlib = None
+_hnswlib_checked = False
+
+
+def _import_faiss():
+    """Lazy import of FAISS. Returns None if it is not installed."""
+    global faiss, _faiss_checked
+    if not _faiss_checked:
+        _faiss_checked = True
+        try:
+            import faiss as _faiss
+            faiss = _faiss
+        except ImportError:
+            pass
+    return faiss
+
+
+def _import_hnswlib():
+    """Lazy import of hnswlib. Returns None if it is not installed."""
+    global hnswlib, _hnswlib_checked
+    if not _hnswlib_checked:
+        _hnswlib_checked = True
+        try:
+            import hnswlib as _hnswlib
+            hnswlib = _hnswlib
+        except ImportError:
+            print("Neither FAISS nor hnswlib is installed; large galleries will be scanned "
+                  "exhaustively. Install with: pip install faiss-cpu")
+    return hnswlib
+
+
+def names_path_for(encodings_path):
+    """Return the JSON sidecar path that stores names for an encodings file."""
+    return Path(encodings_path).with_suffix(".json")
+
+
+def norms_path_for(encodings_path):
+    """Return the path of the squared-norm vector saved next to an encodings file."""
+    encodings_path = Path(encodings_path)
+    return encodings_path.with_name(encodings_path.stem + "_sq_norms.npy")
+
+
+def _squared_norms(matrix):
+    """Row-wise squared L2 norms of a float32 matrix."""
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+
+def save_encodings(encodings_path, names, encodings):
+    """
+    Save face encodings, their names and their squared norms.
+
+    Args:
+        encodings_path: Path to the ``.npy`` encodings file
+        names: List of person names, one per encoding
+        encodings: Sequence of 128-D encodings (or an N x 128 array)
+
+    Returns:
+        The float32 encodings matrix that was written
+    """
+    encodings_path = Path(encodings_path)
+    names_path = names_path_for(encodings_path)
+    matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+
+    # Write to temporary files and swap them in, so readers that still have
+    # the old matrix memory-mapped never see a truncated file
+    norms_path = norms_path_for(encodings_path)
+    temp_encodings_path = encodings_path.with_name(encodings_path.name + ".tmp")
+    temp_norms_path = norms_path.with_name(norms_path.name + ".tmp")
+    temp_names_path = names_path.with_name(names_path.name + ".tmp")
+    with temp_encodings_path.open("wb") as f:
+        np.save(f, matrix)
+    with temp_norms_path.open("wb") as f:
+        np.save(f, _squared_norms(matrix))
+    with temp_names_path.open("w", encoding="utf-8") as f:
+        # The sidecar is replaced last and flags that the norms file matches
+        json.dump({"names": list(names), "sq_norms": True}, f)
+    os.replace(temp_encodings_path, encodings_path)
+    os.replace(temp_norms_path, norms_path)
+    os.replace(temp_names_path, names_path)
+    return matrix
+
+
+def _migrate_legacy_pickle(encodings_path, legacy_path):
+    """Convert a legacy ``{"names", "encodings"}`` pickle to the ``.npy`` format."""
+    with legacy_path.open(mode="rb") as f:
+        data = pickle.load(f)
+    save_encodings(encodings_path, data.get("names", []), data.get("encodings", []))
+    print(f"✓ Migrated {legacy_path} to {encodings_path}")
+
+
+def load_encodings(encodings_path):
+    """
+    Load face encodings, memory-mapping the encodings matrix.
+
+    A legacy pickle next to the ``.npy`` path (same stem, ``.pkl`` suffix) is
+    migrated once on first load.
+
+    Args:
+        encodings_path: Path to the ``.npy`` encodings file
+
+    Returns:
+        Dict with "names" (list), "encodings" (N x 128 float32 array) and,
+        when saved alongside, "sq_norms" (N squared norms), or None if no
+        encodings have been saved yet
+    """
+    encodings_path = Path(encodings_path)
+    names_path = names_path_for(encodings_path)
+    legacy_path = encodings_path.with_suffix(".pkl")
+
+    if not encodings_path.exists() and legacy_path.exists():
+        _migrate_legacy_pickle(encodings_path, legacy_path)
+
+    if not encodings_path.exists() or not names_path.exists():
+        return None
+
+    try:
+        encodings = np.load(encodings_path, mmap_mode="r")
+    except ValueError:
+        # Empty matrices cannot be memory-mapped
+        encodings = np.load(encodings_path)
+    with names_path.open(encoding="utf-8") as f:
+        sidecar = json.load(f)
+    names = sidecar["names"]
+
+    loaded = {"names": names, "encodings": encodings}
+    norms_path = norms_path_for(encodings_path)
+    if sidecar.get("sq_norms") and norms_path.exists():
+        sq_norms = np.load(norms_path)
+        if sq_norms.shape == (len(names),):
+            loaded["sq_norms"] = sq_norms
+    return loaded
+
+
+class FaceGallery:
+    """
+    Contiguous float32 view of a model's known encodings for fast matching.
+
+    Euclidean distances to a query are computed with the expansion
+    ||g - q||^2 = ||g||^2 - 2 g.q + ||q||^2, which turns the per-frame scan
+    into a single matrix-vector product over the gallery.
+    """
+
+    def __init__(self, names, encodings, encodings_path=None, sq_norms=None):
+        """
+        Build a gallery.
+
+        Args:
+            names: List of person names, one per encoding
+            encodings: N x 128 array (may be memory-mapped) or list of encodings
+            encodings_path: Path the encodings were loaded from; used to persist
+                the FAISS index next to it (optional)
+            sq_norms: Precomputed squared norms of the encodings, as saved by
+                save_encodings (optional, computed when missing)
+        """
+        self.names = list(names)
+        # Integer id per entry so name votes can be tallied with np.bincount
+        person_names, self.person_ids = np.unique(self.names, return_inverse=True)
+        self.person_names = person_names.tolist()
+        self.matrix = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        if sq_norms is not None and len(sq_norms) == len(self.matrix):
+            self.sq_norms = np.asarray(sq_norms, dtype=np.float32)
+        else:
+            self.sq_norms = _squared_norms(self.matrix)
+        self.index = None
+        self.hnsw_index = None
+        if len(self.names) >= IVF_MIN_SIZE:
+            if _import_faiss() is not None:
+                self.index = self._load_or_build_index(encodings_path)
+            elif _import_hnswlib() is not None:
+                self.hnsw_index = self._build_hnsw_index()
+
+    def __len__(self):
+        return len(self.names)
+
+    def squared_distances(self, face_encoding):
+        """
+        Compute squared Euclidean distances from one encoding to every gallery entry.
+
+        Args:
+            face_encoding: 128-D query encoding
+
+        Returns:
+            Array of N squared distances
+        """
+        return self.squared_distances_batch(face_encoding)[0]
+
+    def squared_distances_batch(self, face_encodings):
+        """
+        Compute squared Euclidean distances from several encodings at once.
+
+        All queries are handled by one matrix product against the gallery
+        instead of one matrix-vector product per face.
+
+        Args:
+            face_encodings: K query encodings (or a single 128-D encoding)
+
+        Returns:
+            K x N array of squared distances
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        sq_distances = queries @ self.matrix.T
+        sq_distances *= -2.0
+        sq_distances += self.sq_norms
+        sq_distances += _squared_norms(queries)[:, None]
+        # Rounding can push identical vectors slightly below zero
+        return np.maximum(sq_distances, 0.0, out=sq_distances)
+
+    def distances(self, face_encoding):
+        """
+        Compute Euclidean distances from one encoding to every gallery entry.
+
+        Args:
+            face_encoding: 128-D query encoding
+
+        Returns:
+            Array of N distances (same semantics as face_recognition.face_distance)
+        """
+        sq_distances = self.squared_distances(face_encoding)
+        return np.sqrt(sq_distances, out=sq_distances)
+
+    def candidates(self, face_encoding, threshold):
+        """
+        Find gallery entries within a distance threshold of an encoding.
+
+        At most the ANN_NEIGHBORS nearest matches are returned. Small
+        galleries are scanned exactly; large galleries take that shortlist
+        from the 8-bit quantized FAISS index (or the HNSW graph) and
+        recompute its distances exactly.
+
+        Args:
+            face_encoding: 128-D query encoding
+            threshold: Maximum Euclidean distance for a match
+
+        Returns:
+            Tuple of (indices, distances) for the matching entries
+        """
+        return self.candidates_batch(face_encoding, threshold)[0]
+
+    def candidates_batch(self, face_encodings, threshold):
+        """
+        Find the gallery entries within a distance threshold of several encodings.
+
+        Same matching as candidates(), but the distance scan (or index search)
+        for all queries is done in a single call.
+
+        Args:
+            face_encodings: K query encodings (or a single 128-D encoding)
+            threshold: Maximum Euclidean distance for a match
+
+        Returns:
+            List of K (indices, distances) tuples, one per query
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        results = []
+
+        neighbors = None
+        if self.index is not None:
+            _, neighbors = self.index.search(queries, ANN_NEIGHBORS)
+        elif self.hnsw_index is not None:
+            neighbors, _ = self.hnsw_index.knn_query(queries, k=ANN_NEIGHBORS)
+            neighbors = neighbors.astype(np.int64)
+
+        if neighbors is not None:
+            for query, indices in zip(queries, neighbors):
+                indices = indices[indices >= 0]
+                # FAISS only holds 8-bit codes and HNSW search is approximate,
+                # so re-rank the shortlist with exact float32 distances before
+                # applying the threshold
+                diff = self.matrix[indices] - query
+                distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+                keep = distances <= threshold
+                results.append((indices[keep], distances[keep]))
+            return results
+
+        # Threshold on squared distances so only the matches need a sqrt
+        sq_threshold = threshold * threshold
+        for sq_distances in self.squared_distances_batch(queries):
+            indices = np.flatnonzero(sq_distances <= sq_threshold)
+            if len(indices) > ANN_NEIGHBORS:
+                # Keep the same shortlist size as the index path; partitioning
+                # the matches is linear, unlike a full sort
+                nearest = np.argpartition(sq_distances[indices], ANN_NEIGHBORS - 1)[:ANN_NEIGHBORS]
+                indices = indices[nearest]
+            results.append((indices, np.sqrt(sq_distances[indices])))
+        return results
+
+    def _build_index(self):
+        """
+        Build an IVF index with roughly sqrt(N) clusters.
+
+        Vectors are stored as 8-bit scalar-quantized codes (trained per
+        dimension), a quarter of the float32 size, so scanning the probed
+        lists moves far less memory.
+        """
+        nlist = max(1, int(np.sqrt(len(self.names))))
+        quantizer = faiss.IndexFlatL2(ENCODING_DIM)
+        index = faiss.IndexIVFScalarQuantizer(
+            quantizer, ENCODING_DIM, nlist, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2
+        )
+        index.train(self.matrix)
+        index.add(self.matrix)
+        # Keep the coarse quantizer alive for as long as the index
+        self._quantizer = quantizer
+        return index
+
+    def _build_hnsw_index(self):
+        """
+        Build an in-memory HNSW graph (hnswlib) over the gallery.
+
+        Used when FAISS is not installed. The L2 space keeps the Euclidean
+        matching semantics; the graph is rebuilt with the gallery.
+        """
+        index = hnswlib.Index(space="l2", dim=ENCODING_DIM)
+        index.init_index(
+            max_elements=len(self.names), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M
+        )
+        index.add_items(self.matrix, np.arange(len(self.names)))
+        # ef must be at least the number of neighbours requested
+        index.set_ef(max(HNSW_EF_SEARCH, ANN_NEIGHBORS))
+        return index
+
+    def _checksum(self, count):
+        """Content hash of the first ``count`` gallery rows."""
+        return hashlib.blake2b(self.matrix[:count].tobytes(), digest_size=16).hexdigest()
+
+    def _load_or_build_index(self, encodings_path):
+        """
+        Load the persisted index for this gallery, extending or rebuilding it as needed.
+
+        The index is reused when the gallery rows it was built from are still
+        the first rows of the gallery; rows appended since (incremental
+        training) are added to it. It is rebuilt when those rows changed or
+        the gallery has more than doubled, since the IVF clusters were
+        trained on the old data.
+        """
+        index = None
+        indexed_count = 0
+        index_path = stamp_path = None
+        if encodings_path is not None:
+            encodings_path = Path(encodings_path)
+            index_path = encodings_path.with_suffix(".faiss")
+            stamp_path = encodings_path.with_name(encodings_path.stem + "_faiss.json")
+            try:
+                if index_path.exists() and stamp_path.exists():
+                    with stamp_path.open(encoding="utf-8") as f:
+                        stamp = json.load(f)
+                    count = stamp.get("count", 0)
+                    if (stamp.get("format") == INDEX_FORMAT
+                            and 0 < count <= len(self.names) < 2 * count
+                            and stamp.get("checksum") == self._checksum(count)):
+                        index = faiss.read_index(str(index_path))
+                        indexed_count = count
+            except Exception as e:
+                print(f"Could not load FAISS index for {encodings_path}: {e}")
+                index = None
+
+        if index is None:
+            index = self._build_index()
+        elif indexed_count < len(self.names):
+            index.add(self.matrix[indexed_count:])
+        else:
+            # Persisted index is up to date
+            index_path = None
+
+        if index_path is not None:
+            try:
+                faiss.write_index(index, str(index_path))
+                with stamp_path.open("w", encoding="utf-8") as f:
+                    json.dump({
+                        "format": INDEX_FORMAT,
+                        "count": len(self.names),
+                        "checksum": self._checksum(len(self.names)),
+                    }, f)
+            except Exception as e:
+                print(f"Could not save FAISS index for {encodings_path}: {e}")
+
+        index.nprobe = min(IVF_NPROBE, index.nlist)
+        return index
@@ -167,6 +167,44 @@ class GeminiLiveAPI:
             print(f"⚠️ Could not get mic info: {e}, using default")
             mic_info = {"index": None}
         
+        loop = asyncio.get_running_loop()
+        chunk_count = 0
+        
+        def enqueue_chunk(data):
+            """Queue one microphone chunk for sending (runs on the event loop)."""
+            nonlocal chunk_count
+            # Put audio in queue for sending - format matches official example
+            msg = {"data": data, "mime_type": "audio/pcm"}
+            try:
+                self.audio_input_queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                # The sender fell behind; drop the oldest chunk to stay real-time
+                try:
+                    self.audio_input_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                self.audio_input_queue.put_nowait(msg)
+            
+            chunk_count += 1
+            if chunk_count == 1:
+                print("🎤 Capturing audio from microphone...")
+        
+        def on_audio(in_data, frame_count, time_info, status):
+            """PortAudio callback: hand each chunk to the event loop.
+            
+            Runs on PortAudio's own audio thread, so no Python thread has to
+            poll the stream with blocking reads. Overflow flags in status are
+            ignored, as exception_on_overflow=False did.
+            """
+            if not (self.is_streaming and self.is_connected):
+                return (None, pyaudio.paComplete)
+            try:
+                loop.call_soon_threadsafe(enqueue_chunk, in_data)
+            except RuntimeError:
+                # Event loop already closed
+                return (None, pyaudio.paComplete)
+            return (None, pyaudio.paContinue)
+        
         # Open microphone stream with correct format (16-bit PCM, 16kHz, mono)
         self.audio_input_stream = await asyncio.to_thread(
             self.pyaudio_instance.open,
@@ -176,6 +214,7 @@ class GeminiLiveAPI:
             input=True,
             input_device_index=mic_info.get("index") if mic_info.get("index") is not None else None,
             frames_per_buffer=self.CHUNK_SIZE,
+            stream_callback=on_audio,
         )
         
         print("🎤 Microphone stream started - speak now!")
@@ -184,43 +223,12 @@ class GeminiLiveAPI:
         print(f"   Channels: {self.CHANNELS} (mono)")
         print(f"   Chunk Size: {self.CHUNK_SIZE} frames")
         
-        # Use exception_on_overflow=False in debug mode (matches official example)
-        kwargs = {"exception_on_overflow": False} if __debug__ else {}
-        chunk_count = 0
-        
-        while self.is_streaming and self.is_connected:
-            try:
-                # Read audio data from microphone
-                data = await asyncio.to_thread(
-                    self.audio_input_stream.read,
-                    self.CHUNK_SIZE,
-                    **kwargs
-                )
-                
-                # Verify data format (should be bytes, 16-bit = 2 bytes per sample)
-                if not isinstance(data, bytes):
-                    print(f"⚠️ Warning: Audio data is not bytes, got {type(data)}")
-                    continue
-                
-                # Put audio in queue for sending - format matches official example
-                await self.audio_input_queue.put({
-                    "data": data,
-                    "mime_type": "audio/pcm"
-                })
-                
-                chunk_count += 1
-                if chunk_count == 1:
-                    print("🎤 Capturing audio from microphone...")
-                    
-            except asyncio.CancelledError:
-                print("🎤 Audio listener cancelled")
-                break
-            except Exception as e:
-                if self.is_streaming:  # Only log if we're supposed to be streaming
-                    print(f"⚠️ Error reading audio: {e}")
-                    import traceback
-                    traceback.print_exc()
-                break
+        # The callback fills the queue; just stay alive while streaming
+        try:
+            while self.is_streaming and self.is_connected:
+                await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            print("🎤 Audio listener cancelled")
     
     async def _send_realtime_audio(self, session):
         """Sends audio from the input queue to the Live API session."""
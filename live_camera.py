@@ -2,40 +2,41 @@
 
 import cv2
 import face_recognition
-import pickle
+import face_gallery
 from pathlib import Path
 import numpy as np
 
-DEFAULT_ENCODINGS_PATH = Path("output/encodings.pkl")
+DEFAULT_ENCODINGS_PATH = Path("output/encodings.npy")
+
+
+def _assign_name_ids(loaded_encodings):
+    """Map each encoding's name to a small integer id so votes can be counted with bincount."""
+    id_names, name_ids = np.unique(loaded_encodings["names"], return_inverse=True)
+    loaded_encodings["id_names"] = id_names.tolist()
+    loaded_encodings["name_ids"] = name_ids
+    return loaded_encodings
 
 
 def load_encodings(encodings_location: Path = DEFAULT_ENCODINGS_PATH):
     """Load face encodings from disk."""
-    try:
-        with encodings_location.open(mode="rb") as f:
-            loaded_encodings = pickle.load(f)
-        print(f"Loaded encodings for {len(set(loaded_encodings['names']))} person(s)")
-        return loaded_encodings
-    except FileNotFoundError:
+    loaded_encodings = face_gallery.load_encodings(encodings_location)
+    if loaded_encodings is None:
         print(f"Error: Encodings file not found at {encodings_location}")
         print("Please train the model first using: python detector.py --train")
         return None
+    loaded_encodings = _assign_name_ids(loaded_encodings)
+    print(f"Loaded encodings for {len(set(loaded_encodings['names']))} person(s)")
+    return loaded_encodings
 
 
 def recognize_face_in_frame(face_encoding, loaded_encodings):
     """Compare face encoding with known encodings and return best match."""
-    from collections import Counter
-    
-    boolean_matches = face_recognition.compare_faces(
+    boolean_matches = np.asarray(face_recognition.compare_faces(
         loaded_encodings["encodings"], face_encoding, tolerance=0.6
-    )
-    votes = Counter(
-        name
-        for match, name in zip(boolean_matches, loaded_encodings["names"])
-        if match
-    )
-    if votes:
-        return votes.most_common(1)[0][0]
+    ), dtype=bool)
+    if boolean_matches.any():
+        votes = np.bincount(loaded_encodings["name_ids"][boolean_matches])
+        return loaded_encodings["id_names"][votes.argmax()]
     return None
 
 
@@ -38,7 +38,11 @@ class RetinaFaceDetector:
                     )
                 raise
         
-        self.model_loaded = True  # RetinaFace loads automatically on import
+        # Build the network once here; otherwise the first frame pays for it and
+        # every call looks the model up again
+        build_model = getattr(RetinaFace, "build_model", None)
+        self.model = build_model() if build_model else None
+        self.model_loaded = True
         print("RetinaFace model loaded successfully!")
         print("  RetinaFace: Deep learning based face detector with landmarks")
     
@@ -60,56 +64,53 @@ class RetinaFaceDetector:
         else:
             raise ValueError("Image must be PIL Image or numpy array")
         
-        # Save temporarily if it's an array (RetinaFace needs file path)
-        # Or convert to RGB if needed
-        if len(image_array.shape) == 3:
-            # Ensure RGB
-            if image_array.shape[2] == 4:  # RGBA
-                image_array = image_array[:, :, :3]
-        
-        # RetinaFace can work with numpy arrays directly in newer versions
-        # But for compatibility, we'll save to temp file
-        import tempfile
-        import os
-        
-        temp_file = None
+        # RetinaFace takes BGR arrays directly, so nothing is written to disk
+        if image_array.ndim == 2:
+            bgr_image = cv2.cvtColor(image_array, cv2.COLOR_GRAY2BGR)
+        elif image_array.shape[2] == 4:  # RGBA
+            bgr_image = cv2.cvtColor(image_array, cv2.COLOR_RGBA2BGR)
+        else:
+            bgr_image = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
+        return self._detect_bgr(bgr_image)
+    
+    def _detect_bgr(self, frame):
+        """Run RetinaFace on a BGR array and return (top, right, bottom, left) locations."""
         try:
-            # Create temporary file
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-            os.close(temp_fd)
-            
-            # Save image to temp file
-            temp_image = Image.fromarray(image_array)
-            temp_image.save(temp_path, 'JPEG')
-            
-            # Detect faces
-            faces = RetinaFace.detect_faces(temp_path)
+            faces = RetinaFace.detect_faces(frame, model=self.model)
             
             # Convert to face_recognition format: (top, right, bottom, left)
             face_locations = []
-            for face_key, face_data in faces.items():
-                facial_area = face_data['facial_area']
-                # RetinaFace returns [x1, y1, x2, y2]
-                x1, y1, x2, y2 = facial_area
-                # Convert to (top, right, bottom, left)
-                top = int(y1)
-                right = int(x2)
-                bottom = int(y2)
-                left = int(x1)
-                face_locations.append((top, right, bottom, left))
+            if isinstance(faces, dict):
+                for face_key, face_data in faces.items():
+                    facial_area = face_data['facial_area']
+                    # RetinaFace returns [x1, y1, x2, y2]
+                    x1, y1, x2, y2 = facial_area
+                    # Convert to (top, right, bottom, left)
+                    top = int(y1)
+                    right = int(x2)
+                    bottom = int(y2)
+                    left = int(x1)
+                    face_locations.append((top, right, bottom, left))
             
             return face_locations
             
         except Exception as e:
             print(f"Error in RetinaFace detection: {e}")
             return []
-        finally:
-            # Clean up temp file
-            if 'temp_path' in locals() and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+    
+    def detect_batch(self, images):
+        """
+        Detect faces in several images.
+        
+        RetinaFace has no batched inference API, so images are processed one by one.
+        
+        Args:
+            images: List of RGB numpy arrays
+            
+        Returns:
+            List with one list of (top, right, bottom, left) locations per image
+        """
+        return [self.detect_faces(image) for image in images]
     
     def detect_faces_cv2(self, frame):
         """
@@ -121,7 +122,17 @@ class RetinaFaceDetector:
         Returns:
             List of face locations in format (top, right, bottom, left)
         """
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.detect_faces(rgb_frame)
+        return self._detect_bgr(frame)
+    
+    def detect_batch_cv2(self, frames):
+        """
+        Detect faces in several OpenCV frames (BGR format).
+        
+        Args:
+            frames: List of OpenCV frames (BGR)
+            
+        Returns:
+            List with one list of (top, right, bottom, left) locations per frame
+        """
+        return [self.detect_faces_cv2(frame) for frame in frames]
 
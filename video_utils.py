@@ -7,8 +7,126 @@ import numpy as np
 from pathlib import Path
 from PIL import Image
 
+# Decord decodes sampled frames much faster than sequential cv2 reads,
+# but it is optional - import lazily and fall back to OpenCV
+decord = None
+_decord_checked = False
 
-def extract_frames_from_video(video_path, output_dir, frames_per_second=1, max_frames=None):
+
+def _import_decord():
+    """Lazy import of decord. Returns None if it is not installed."""
+    global decord, _decord_checked
+    if not _decord_checked:
+        _decord_checked = True
+        try:
+            import decord as _decord
+            decord = _decord
+        except ImportError:
+            print("decord not installed; decoding videos with OpenCV. "
+                  "Install with: pip install decord")
+    return decord
+
+
+# Sampling intervals (in frames) from which seeking beats decoding every frame
+SEEK_MIN_INTERVAL = 24
+
+
+def _frame_interval(fps, frames_per_second):
+    """Number of source frames between two samples."""
+    if frames_per_second <= 0 or not fps or fps <= 0:
+        return 1
+    return max(1, int(fps / frames_per_second))
+
+
+def sample_video_frames(video_path, frames_per_second=1, max_frames=None, batch_size=16, rgb=True):
+    """
+    Decode a sparse sample of frames from a video in batches.
+    
+    With decord installed the sampled indices are decoded directly in one
+    call per batch. Otherwise OpenCV seeks to each sample when they are
+    far apart, and steps over unsampled frames with grab() (skipping their
+    color conversion) when they are close together.
+    
+    Args:
+        video_path: Path to video file
+        frames_per_second: How many frames to sample per second of video
+        max_frames: Maximum number of frames to sample (None for all)
+        batch_size: Number of frames per yielded batch
+        rgb: Yield RGB frames (False for OpenCV's BGR order)
+    
+    Yields:
+        List of up to batch_size frames as numpy arrays
+    """
+    vd = _import_decord()
+    if vd is not None:
+        try:
+            reader = vd.VideoReader(str(video_path), ctx=vd.cpu(0))
+        except Exception as e:
+            raise ValueError(f"Could not open video: {video_path} ({e})")
+        
+        interval = _frame_interval(reader.get_avg_fps(), frames_per_second)
+        indices = list(range(0, len(reader), interval))
+        if max_frames:
+            indices = indices[:max_frames]
+        
+        for start in range(0, len(indices), batch_size):
+            # Decord returns one contiguous (B, H, W, 3) RGB array per batch
+            frames = reader.get_batch(indices[start:start + batch_size]).asnumpy()
+            if not rgb:
+                frames = np.ascontiguousarray(frames[..., ::-1])
+            yield list(frames)
+        return
+    
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    
+    try:
+        interval = _frame_interval(cap.get(cv2.CAP_PROP_FPS), frames_per_second)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames > 0 and interval >= SEEK_MIN_INTERVAL and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+            # Sparse samples: seek to each one instead of decoding everything in between
+            indices = range(0, total_frames, interval)
+            if max_frames:
+                indices = indices[:max_frames]
+            batch = []
+            for index in indices:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                batch.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb else frame)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            return
+        
+        frame_count = 0
+        sampled_count = 0
+        batch = []
+        while not (max_frames and sampled_count >= max_frames):
+            if not cap.grab():
+                break
+            if frame_count % interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                batch.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb else frame)
+                sampled_count += 1
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            frame_count += 1
+        if batch:
+            yield batch
+    finally:
+        cap.release()
+
+
+def extract_frames_from_video(video_path, output_dir, frames_per_second=1, max_frames=None,
+                              prefix="frame"):
     """
     Extract frames from a video file.
     
@@ -17,6 +135,7 @@ def extract_frames_from_video(video_path, output_dir, frames_per_second=1, max_f
         output_dir: Directory to save extracted frames
         frames_per_second: How many frames to extract per second (default: 1)
         max_frames: Maximum number of frames to extract (None for all)
+        prefix: File name prefix for the saved frames
     
     Returns:
         Number of frames extracted
@@ -24,35 +143,14 @@ def extract_frames_from_video(video_path, output_dir, frames_per_second=1, max_f
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video: {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_interval = int(fps / frames_per_second) if frames_per_second > 0 else 1
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    frame_count = 0
     saved_count = 0
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Extract frame at specified interval
-        if frame_count % frame_interval == 0:
-            if max_frames and saved_count >= max_frames:
-                break
-            
+    for batch in sample_video_frames(video_path, frames_per_second, max_frames, rgb=False):
+        for frame in batch:
             # Save frame
-            frame_path = output_dir / f"frame_{saved_count:05d}.jpg"
+            frame_path = output_dir / f"{prefix}_{saved_count:05d}.jpg"
             cv2.imwrite(str(frame_path), frame)
             saved_count += 1
-        
-        frame_count += 1
     
-    cap.release()
     return saved_count
 
 
@@ -106,4 +204,3 @@ def get_video_frames(video_path, max_frames=None):
             frame_count += 1
     finally:
         cap.release()
-
@@ -14,6 +14,21 @@ import cv2
 from pathlib import Path
 import os
 
+
+def _to_model_input(image):
+    """
+    Convert an RGB array to the BGR array ultralytics expects, in one pass.
+    
+    A PIL round trip costs two full-frame copies (fromarray, then
+    ultralytics converting back to a BGR array); other inputs pass through.
+    """
+    if isinstance(image, np.ndarray) and image.ndim == 3 and image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+
 class YOLOFaceDetector:
     """Face detector using YOLOv11n model."""
     
@@ -70,15 +85,31 @@ class YOLOFaceDetector:
         if self.model is None:
             raise RuntimeError("YOLOv11n model not loaded")
         
-        # Convert to PIL Image if numpy array
-        if isinstance(image, np.ndarray):
-            pil_image = Image.fromarray(image)
-        else:
-            pil_image = image
-        
         # Run inference
-        results = self.model(pil_image)
-        detections = Detections.from_ultralytics(results[0])
+        results = self.model(_to_model_input(image))
+        return self._to_face_locations(results[0])
+    
+    def detect_batch(self, images):
+        """
+        Detect faces in several images with a single batched inference call.
+        
+        Args:
+            images: List of numpy arrays (RGB) or PIL Images
+            
+        Returns:
+            List with one list of (top, right, bottom, left) locations per image
+        """
+        if self.model is None:
+            raise RuntimeError("YOLOv11n model not loaded")
+        if not images:
+            return []
+        
+        results = self.model([_to_model_input(image) for image in images])
+        return [self._to_face_locations(result) for result in results]
+    
+    def _to_face_locations(self, result):
+        """Convert one ultralytics result to face_recognition locations."""
+        detections = Detections.from_ultralytics(result)
         
         # Convert to face_recognition format: (top, right, bottom, left)
         face_locations = []
@@ -103,9 +134,29 @@ class YOLOFaceDetector:
         Returns:
             List of face locations in format (top, right, bottom, left)
         """
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.detect_faces(rgb_frame)
+        return self.detect_batch_cv2([frame])[0]
+    
+    def detect_batch_cv2(self, frames):
+        """
+        Detect faces in several OpenCV frames (BGR format) with one inference call.
+        
+        ultralytics treats numpy input as BGR, so frames are passed straight
+        through instead of being converted to RGB and then to PIL images,
+        which YOLO would only convert back to BGR.
+        
+        Args:
+            frames: List of OpenCV frames (BGR)
+            
+        Returns:
+            List with one list of (top, right, bottom, left) locations per frame
+        """
+        if self.model is None:
+            raise RuntimeError("YOLOv11n model not loaded")
+        if not frames:
+            return []
+        
+        results = self.model(list(frames))
+        return [self._to_face_locations(result) for result in results]
 
 # Global detector instance
 _detector_instance = None
@@ -11,6 +11,16 @@ import numpy as np
 import cv2
 from pathlib import Path
 
+
+def _to_model_input(image):
+    """Swap RGB arrays to BGR with one cvtColor instead of a PIL round trip."""
+    if isinstance(image, np.ndarray) and image.ndim == 3 and image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+
 class YOLOv8FaceDetector:
     """Face detector using YOLOv8 model."""
     
@@ -53,13 +63,22 @@ class YOLOv8FaceDetector:
         if self.model is None:
             raise RuntimeError("YOLOv8 model not loaded")
         
-        if isinstance(image, np.ndarray):
-            pil_image = Image.fromarray(image)
-        else:
-            pil_image = image
+        results = self.model(_to_model_input(image))
+        return self._to_face_locations(results[0])
+    
+    def detect_batch(self, images):
+        """Detect faces in several images with a single batched inference call."""
+        if self.model is None:
+            raise RuntimeError("YOLOv8 model not loaded")
+        if not images:
+            return []
         
-        results = self.model(pil_image)
-        detections = Detections.from_ultralytics(results[0])
+        results = self.model([_to_model_input(image) for image in images])
+        return [self._to_face_locations(result) for result in results]
+    
+    def _to_face_locations(self, result):
+        """Convert one ultralytics result to face_recognition locations."""
+        detections = Detections.from_ultralytics(result)
         
         face_locations = []
         for bbox in detections.xyxy:
@@ -74,6 +93,15 @@ class YOLOv8FaceDetector:
     
     def detect_faces_cv2(self, frame):
         """Detect faces in OpenCV frame (BGR format)."""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return self.detect_faces(rgb_frame)
+        return self.detect_batch_cv2([frame])[0]
+    
+    def detect_batch_cv2(self, frames):
+        """Detect faces in several BGR frames; ultralytics reads numpy input as BGR."""
+        if self.model is None:
+            raise RuntimeError("YOLOv8 model not loaded")
+        if not frames:
+            return []
+        
+        results = self.model(list(frames))
+        return [self._to_face_locations(result) for result in results]
 